@@ -0,0 +1,72 @@
+import time
+
+import day09
+import day13
+from intcode_computer import COMPILED_SOURCES, Computer
+
+REPEAT = 3
+
+BASELINE_ENGINE = 'interpreted'
+
+
+def get_arcade_array():
+    array = day13.get_array()
+    array[0] = 2  # Free play
+    return array
+
+
+def run_boost(computer):
+    computer.input.append(2)
+    computer.run()
+
+
+def run_arcade(computer):
+    ball = paddle = 0
+    while True:
+        computer.run()
+        out = computer.output.drain()
+        for i in range(0, len(out), 3):
+            x, _, tile = out[i:i + 3]
+            if tile == day13.Tile.Paddle.n:
+                paddle = x
+            elif tile == day13.Tile.Ball.n:
+                ball = x
+
+        if computer.halted:
+            break
+        computer.input.append((ball > paddle) - (ball < paddle))
+
+
+WORKLOADS = {'day09 BOOST': (day09.get_array, run_boost),
+             'day13 arcade': (get_arcade_array, run_arcade)}
+
+
+def bench(array, workload, engine):
+    best = None
+    steps = 0
+    for _ in range(REPEAT):
+        COMPILED_SOURCES.clear()  # Time block compilation too
+        computer = Computer(array, engine=engine)
+
+        t0 = time.perf_counter()
+        workload(computer)
+        elapsed = time.perf_counter() - t0
+
+        steps = computer.steps
+        best = elapsed if best is None else min(best, elapsed)
+    return steps, best
+
+
+def main():
+    for name, (get_array, workload) in WORKLOADS.items():
+        array = get_array()
+        results = {engine: bench(array, workload, engine) for engine in Computer.Engines}
+        _, baseline_time = results[BASELINE_ENGINE]
+
+        for engine, (steps, elapsed) in results.items():
+            print(f'{name:14} {engine:12} {steps:10d} instr in {elapsed:7.3f}s '
+                  f'{steps / elapsed:12,.0f} instr/s (x{baseline_time / elapsed:.1f})')
+
+
+if __name__ == '__main__':
+    main()
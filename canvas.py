@@ -0,0 +1,203 @@
+import sys
+import time
+
+import numpy as np
+
+
+class GridCanvas:
+    """Sparse 2-D grid of small integer cell codes, stored in an auto-growing numpy array.
+
+    Cells never painted hold Unset. The bounds of the painted cells are tracked as they are painted, and frames
+    are rendered through a lookup table from codes to characters in a handful of numpy calls.
+    """
+    Unset = -1
+    TileSize = 64
+
+    def __init__(self, dtype=np.int16):
+        self.cells = np.full((0, 0), self.Unset, dtype=dtype)
+        self.x0 = self.y0 = 0  # Coordinates of cells[0, 0]
+        self.bounds = None  # x_0, x_f, y_0, y_f of the painted cells, inclusive
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, xy):
+        return self.get(*xy) is not None
+
+    def get(self, x, y, default=None):
+        i, j = y - self.y0, x - self.x0
+        if 0 <= i < self.cells.shape[0] and 0 <= j < self.cells.shape[1]:
+            value = self.cells[i, j]
+            if value != self.Unset:
+                return int(value)
+        return default
+
+    def paint(self, x, y, value):
+        i, j = y - self.y0, x - self.x0
+        if not (0 <= i < self.cells.shape[0] and 0 <= j < self.cells.shape[1]):
+            self.grow(x, y)
+            i, j = y - self.y0, x - self.x0
+
+        if self.cells[i, j] == self.Unset:
+            self.count += 1
+        self.cells[i, j] = value
+
+        if self.bounds is None:
+            self.bounds = x, x, y, y
+        else:
+            x_0, x_f, y_0, y_f = self.bounds
+            if not (x_0 <= x <= x_f and y_0 <= y <= y_f):
+                self.bounds = min(x_0, x), max(x_f, x), min(y_0, y), max(y_f, y)
+
+    def grow(self, x, y):
+        """Reallocate so that (x, y) fits, at least doubling along each axis that has to grow."""
+        h, w = self.cells.shape
+        if not h:
+            x_0, x_f, y_0, y_f = x, x + 1, y, y + 1
+        else:
+            x_0, x_f, y_0, y_f = self.x0, self.x0 + w, self.y0, self.y0 + h
+            x_0 = min(x, x_0 - w) if x < x_0 else x_0
+            x_f = max(x + 1, x_f + w) if x >= x_f else x_f
+            y_0 = min(y, y_0 - h) if y < y_0 else y_0
+            y_f = max(y + 1, y_f + h) if y >= y_f else y_f
+
+        x_0, y_0 = x_0 - x_0 % self.TileSize, y_0 - y_0 % self.TileSize
+        x_f, y_f = x_f + -x_f % self.TileSize, y_f + -y_f % self.TileSize
+
+        cells = np.full((y_f - y_0, x_f - x_0), self.Unset, dtype=self.cells.dtype)
+        cells[self.y0 - y_0:self.y0 - y_0 + h, self.x0 - x_0:self.x0 - x_0 + w] = self.cells
+        self.cells, self.x0, self.y0 = cells, x_0, y_0
+
+    def window(self, x_0, x_f, y_0, y_f):
+        """Cell codes for x_0 <= x <= x_f and y_0 <= y <= y_f (inclusive), indexed [y - y_0, x - x_0]."""
+        out = np.full((y_f - y_0 + 1, x_f - x_0 + 1), self.Unset, dtype=self.cells.dtype)
+        h, w = self.cells.shape
+        i_0, i_f = max(y_0, self.y0), min(y_f + 1, self.y0 + h)
+        j_0, j_f = max(x_0, self.x0), min(x_f + 1, self.x0 + w)
+        if i_0 < i_f and j_0 < j_f:
+            out[i_0 - y_0:i_f - y_0, j_0 - x_0:j_f - x_0] = self.cells[i_0 - self.y0:i_f - self.y0,
+                                                                       j_0 - self.x0:j_f - self.x0]
+        return out
+
+    def items(self):
+        """((x, y), code) for every painted cell."""
+        ys, xs = np.nonzero(self.cells != self.Unset)
+        values = self.cells[ys, xs]
+        return [((int(x) + self.x0, int(y) + self.y0), int(v)) for x, y, v in zip(xs, ys, values)]
+
+    def find(self, value):
+        """Coordinates of every cell holding value."""
+        ys, xs = np.nonzero(self.cells == value)
+        return [(int(x) + self.x0, int(y) + self.y0) for x, y in zip(xs, ys)]
+
+    def count_of(self, value):
+        return int(np.count_nonzero(self.cells == value))
+
+    @staticmethod
+    def make_lut(chars, unset=' '):
+        """Lookup table from cell code + 1 (so Unset maps to slot 0) to a unicode code point."""
+        lut = np.full(max(chars, default=0) + 2, ord(unset), dtype=np.uint32)
+        for code, char in chars.items():
+            lut[code + 1] = ord(char)
+        return lut
+
+    def render_frame(self, lut, bounds=None, margin=0, flip=False, overlay=None):
+        """Frame as a 2-D array of code points; overlay maps (x, y) to a character drawn on top of the cells."""
+        x_0, x_f, y_0, y_f = bounds or self.bounds or (0, 0, 0, 0)
+        x_0, x_f, y_0, y_f = x_0 - margin, x_f + margin, y_0 - margin, y_f + margin
+
+        frame = lut[self.window(x_0, x_f, y_0, y_f) + 1]
+        for (x, y), char in (overlay or {}).items():
+            if x_0 <= x <= x_f and y_0 <= y <= y_f:
+                frame[y - y_0, x - x_0] = ord(char)
+
+        return frame[::-1] if flip else frame
+
+    def render(self, lut, bounds=None, margin=0, flip=False, overlay=None):
+        """Frame as text, one row per line, joined in a single decode."""
+        frame = self.render_frame(lut, bounds, margin, flip, overlay)
+        text = np.empty((frame.shape[0], frame.shape[1] + 1), dtype='<u4')
+        text[:, :-1] = frame
+        text[:, -1] = ord('\n')
+        return text.tobytes().decode('utf-32-le')[:-1]
+
+
+class TerminalRenderer:
+    """Draws successive frames on an ANSI terminal, rewriting only the cells that changed since the last one.
+
+    Each frame goes out in a single write. Frames arriving faster than max_fps are dropped unless forced; pass
+    draw() a callable to have skipped frames never built at all.
+    """
+    Clear = '\x1b[2J'
+    HideCursor = '\x1b[?25l'
+    ShowCursor = '\x1b[?25h'
+
+    def __init__(self, stream=None, max_fps=30):
+        self.stream = stream or sys.stdout
+        self.min_interval = 1 / max_fps if max_fps else 0
+        self.last_time = None
+        self.frame = None
+        self.status = None
+        self.frames = self.dropped = 0
+
+    @staticmethod
+    def move_to(row, col):
+        return f'\x1b[{row + 1};{col + 1}H'
+
+    @staticmethod
+    def text_to_frame(text):
+        """2-D code point array from a multi-line string, padding short lines with spaces."""
+        lines = text.split('\n')
+        width = max(len(line) for line in lines)
+        data = ''.join(line.ljust(width) for line in lines).encode('utf-32-le')
+        return np.frombuffer(data, dtype='<u4').reshape(len(lines), width)
+
+    def due(self, force=False):
+        """Whether a frame drawn now would be shown rather than dropped by the frame-rate cap."""
+        return force or self.last_time is None or time.perf_counter() - self.last_time >= self.min_interval
+
+    def draw(self, frame, status=None, force=False):
+        """Show a frame (code point array, text, or a callable returning one) and an optional status line below."""
+        if not self.due(force):
+            self.dropped += 1
+            return False
+
+        now = time.perf_counter()
+        if callable(frame):
+            frame = frame()
+        if isinstance(frame, str):
+            frame = self.text_to_frame(frame)
+
+        if self.frame is None or self.frame.shape != frame.shape:
+            out = [self.HideCursor, self.Clear, self.move_to(0, 0),
+                   '\r\n'.join(row.tobytes().decode('utf-32-le') for row in frame.astype('<u4'))]
+            self.status = None
+        else:
+            out = []
+            for row in np.flatnonzero((frame != self.frame).any(axis=1)):
+                changed = np.flatnonzero(frame[row] != self.frame[row])
+                # Consecutive changed cells are written as one run after a single cursor move
+                runs = np.split(changed, np.flatnonzero(np.diff(changed) > 1) + 1)
+                for run in runs:
+                    cells = frame[row, run[0]:run[-1] + 1].astype('<u4').tobytes().decode('utf-32-le')
+                    out.append(self.move_to(row, run[0]) + cells)
+
+        if status is not None and status != self.status:
+            out.append(self.move_to(frame.shape[0], 0) + '\x1b[2K' + status)
+            self.status = status
+
+        if out:
+            self.stream.write(''.join(out))
+            self.stream.flush()
+
+        self.frame = frame.copy()
+        self.last_time = now
+        self.frames += 1
+        return True
+
+    def close(self):
+        """Leave the cursor below the last frame."""
+        rows = 0 if self.frame is None else self.frame.shape[0] + (self.status is not None)
+        self.stream.write(self.move_to(rows, 0) + self.ShowCursor + '\n')
+        self.stream.flush()
@@ -1,14 +1,109 @@
-from lib import read_stdin
+import hashlib
+import itertools
+import time
+
+from lib import overridden, read_stdin
+import numpy as np
 import pandas as pd
 
 TEST = False
 
+SYMBOLIC = True
+
+BATCH = True
+
+BENCHMARK = False
+
+VERBOSE = True
+
 DESIRED_OUT = 19690720
 
+MAX_INPUT = 99
+
+FREE_INPUTS = (1, 2)
+
+_SYMBOLIC_OUTPUTS = {}
+_SOLUTIONS = {}
+
+
 class HaltException(Exception):
     pass
 
 
+class SymbolicAddressError(ValueError):
+    pass
+
+
+class Polynomial:
+    """Integer polynomial over the free inputs, as {exponents: coefficient}."""
+
+    def __init__(self, terms):
+        self.terms = {e: c for e, c in terms.items() if c}
+
+    @classmethod
+    def constant(cls, value, n_vars):
+        return cls({(0,) * n_vars: value})
+
+    @classmethod
+    def variable(cls, i, n_vars):
+        return cls({tuple(int(j == i) for j in range(n_vars)): 1})
+
+    @property
+    def is_constant(self):
+        return all(not any(e) for e in self.terms)
+
+    @property
+    def is_affine(self):
+        return all(sum(e) <= 1 for e in self.terms)
+
+    @property
+    def value(self):
+        return sum(self.terms.values())
+
+    def degree(self, i):
+        return max((e[i] for e in self.terms), default=0)
+
+    def __add__(self, other):
+        terms = dict(self.terms)
+        for e, c in other.terms.items():
+            terms[e] = terms.get(e, 0) + c
+        return Polynomial(terms)
+
+    def __mul__(self, other):
+        terms = {}
+        for (e0, c0), (e1, c1) in itertools.product(self.terms.items(), other.terms.items()):
+            e = tuple(x + y for x, y in zip(e0, e1))
+            terms[e] = terms.get(e, 0) + c0 * c1
+        return Polynomial(terms)
+
+    def __call__(self, *values):
+        return sum(c * _monomial(e, values) for e, c in self.terms.items())
+
+    def substitute(self, values):
+        """Fix the first len(values) variables, keeping the rest symbolic."""
+        terms = {}
+        for e, c in self.terms.items():
+            fixed, free = e[:len(values)], e[len(values):]
+            terms[(0,) * len(values) + free] = terms.get((0,) * len(values) + free, 0) + c * _monomial(fixed, values)
+        return Polynomial(terms)
+
+    def __repr__(self):
+        if not self.terms:
+            return '0'
+        monomials = []
+        for e, c in sorted(self.terms.items(), reverse=True):
+            factors = [f'x{i}' if n == 1 else f'x{i}^{n}' for i, n in enumerate(e) if n]
+            monomials.append('*'.join(([str(c)] if c != 1 or not factors else []) + factors))
+        return ' + '.join(monomials)
+
+
+def _monomial(exponents, values):
+    result = 1
+    for x, n in zip(values, exponents):
+        result *= x ** n
+    return result
+
+
 def call_func(array, pos):
     func = FUNCTIONS[array[pos]]
     return func(array, pos)
@@ -17,7 +112,8 @@ def call_func(array, pos):
 def suma(array, pos):
     if array[pos] != 1:
         raise RuntimeError('SUM is 1')
-    print('Summing {} with {} and storing in {}'.format(array[pos + 1], array[pos + 2], array[pos + 3]))
+    if VERBOSE:
+        print('Summing {} with {} and storing in {}'.format(array[pos + 1], array[pos + 2], array[pos + 3]))
     array[array[pos + 3]] = array[array[pos + 2]] + array[array[pos + 1]]
     return array
 
@@ -25,7 +121,8 @@ def suma(array, pos):
 def multiply(array, pos):
     if array[pos] != 2:
         raise RuntimeError('MUL is 2')
-    print('Multiplying {} with {} and storing in {}'.format(array[pos + 1], array[pos + 2], array[pos + 3]))
+    if VERBOSE:
+        print('Multiplying {} with {} and storing in {}'.format(array[pos + 1], array[pos + 2], array[pos + 3]))
     array[array[pos + 3]] = array[array[pos + 2]] * array[array[pos + 1]]
 
     return array
@@ -41,30 +138,270 @@ def halt(array, pos):
 FUNCTIONS = {1: suma, 2: multiply, 99: halt}
 
 
-def run_program(array):
-    print(array)
+def run_program(array, start=0):
+    if VERBOSE:
+        print(array)
     try:
-        for i in [r * 4 for r in range(len(array) // 4)]:
-            print(i, array[i:i + 4])
+        for i in [r * 4 for r in range(start // 4, len(array) // 4)]:
+            if VERBOSE:
+                print(i, array[i:i + 4])
             array = call_func(array, i)
-            print(array)
+            if VERBOSE:
+                print(array)
 
     except HaltException:
-        print('Halted')
+        if VERBOSE:
+            print('Halted')
     return array
 
 
+def get_program_hash(array):
+    return hashlib.sha1(repr(tuple(array)).encode()).hexdigest()
+
+
+def run_symbolic(array, free=FREE_INPUTS):
+    """array[0] as a polynomial of the values at the free positions, from a single run of the program.
+
+    Reading through an address that depends on the free inputs yields an opaque value (None), which
+    is fine as long as it is overwritten before being used. SymbolicAddressError is raised when an
+    opcode, an address or the output cannot be resolved, and RuntimeError on unknown opcodes or
+    constant addresses outside the program.
+    """
+    n_vars = len(free)
+    mem = [Polynomial.constant(v, n_vars) for v in array]
+    for i, pos in enumerate(free):
+        mem[pos] = Polynomial.variable(i, n_vars)
+
+    def concrete(pos):
+        if mem[pos] is None or not mem[pos].is_constant:
+            raise SymbolicAddressError(f'Value at {pos} depends on the free inputs ({mem[pos]})')
+        return mem[pos].value
+
+    def in_range(addr, pos):
+        if not 0 <= addr < len(mem):
+            raise RuntimeError(f'Address {addr} at {pos} is out of the program ({len(mem)} values)')
+        return addr
+
+    def address(pos):
+        if mem[pos] is not None and mem[pos].is_constant:
+            return in_range(mem[pos].value, pos)
+        return None
+
+    for pos in range(0, len(mem) - len(mem) % 4, 4):
+        op = concrete(pos)
+        if op == 99:
+            break
+        if op not in (1, 2):
+            raise RuntimeError(f'Unknown opcode {op} at {pos}')
+        a, b, dest = address(pos + 1), address(pos + 2), in_range(concrete(pos + 3), pos + 3)
+        x, y = mem[a] if a is not None else None, mem[b] if b is not None else None
+        if x is None or y is None:
+            mem[dest] = None
+        else:
+            mem[dest] = x + y if op == 1 else x * y
+
+    if mem[0] is None:
+        raise SymbolicAddressError('Output depends on values read through symbolic addresses')
+    return mem[0]
+
+
+def get_symbolic_output(array, free=FREE_INPUTS):
+    key = get_program_hash(array), free
+    if key not in _SYMBOLIC_OUTPUTS:
+        _SYMBOLIC_OUTPUTS[key] = run_symbolic(array, free)
+    return _SYMBOLIC_OUTPUTS[key]
+
+
+def solve_affine(expression, target, n_vars, max_input=MAX_INPUT):
+    """Lexicographically first inputs (each in 0..max_input) making an affine expression equal target, or None.
+
+    Variables are fixed from the largest coefficient down, each one only over the values for which the
+    remaining ones can still make up the difference. When the coefficients are positional (as in
+    248832*x0 + x1 + c) that is a single value per variable, so the cost is linear in the number of inputs.
+    """
+    coefficients = [expression.terms.get(tuple(int(j == i) for j in range(n_vars)), 0) for i in range(n_vars)]
+    order = sorted((i for i in range(n_vars) if coefficients[i]), key=lambda i: -abs(coefficients[i]))
+
+    reach = [(0, 0)] * (len(order) + 1)  # Range of values the variables order[k:] can add up to
+    for k in reversed(range(len(order))):
+        span, (lo, hi) = coefficients[order[k]] * max_input, reach[k + 1]
+        reach[k] = lo + min(span, 0), hi + max(span, 0)
+
+    def search(k, residual, values):
+        if k == len(order):
+            if not residual:
+                yield tuple(values)
+            return
+
+        a, (lo, hi) = coefficients[order[k]], reach[k + 1]
+        if a > 0:
+            x_0, x_f = -((hi - residual) // a), (residual - lo) // a
+        else:
+            x_0, x_f = -((residual - lo) // -a), (hi - residual) // -a
+        for x in range(max(x_0, 0), min(x_f, max_input) + 1):
+            values[order[k]] = x
+            yield from search(k + 1, residual - a * x, values)
+
+    return min(search(0, target - expression.terms.get((0,) * n_vars, 0), [0] * n_vars), default=None)
+
+
+def solve_symbolic(array, target=DESIRED_OUT, free=FREE_INPUTS, max_input=MAX_INPUT):
+    """First inputs (in lexicographic order, each in 0..max_input) making array[0] == target, or None.
+
+    Affine outputs are inverted directly with solve_affine. Otherwise all inputs but the last are
+    enumerated, and the last one is solved for directly when the output is affine in it.
+    """
+    key = get_program_hash(array), free, target, max_input
+    if key in _SOLUTIONS:
+        return _SOLUTIONS[key]
+
+    expression = get_symbolic_output(array, free)
+    if expression.is_affine:
+        _SOLUTIONS[key] = solve_affine(expression, target, len(free), max_input)
+        return _SOLUTIONS[key]
+
+    last = len(free) - 1
+    solution = None
+
+    for prefix in itertools.product(range(max_input + 1), repeat=last):
+        reduced = expression.substitute(prefix)
+        if reduced.degree(last) <= 1:
+            exponent = tuple(int(i == last) for i in range(len(free)))
+            slope = reduced.terms.get(exponent, 0)
+            offset = reduced(*prefix, 0)
+            if slope:
+                x, remainder = divmod(target - offset, slope)
+                candidates = [x] if not remainder and 0 <= x <= max_input else []
+            else:
+                candidates = [0] if offset == target else []
+        else:
+            candidates = [x for x in range(max_input + 1) if reduced(*prefix, x) == target]
+
+        if candidates:
+            solution = prefix + (candidates[0],)
+            break
+
+    _SOLUTIONS[key] = solution
+    return solution
+
+
+def run_batch(array, nouns, verbs):
+    """Run the program once per (noun, verb) lane, lane-parallel while every lane runs the same opcode.
+
+    Memory is laid out address-major, so a cell is a contiguous vector over the lanes. Lanes reaching
+    a different opcode, or addressing outside the program, are finished one by one with run_program.
+    Returns array[0] per lane and a mask of the lanes that ran to completion.
+    """
+    n_lanes = len(nouns)
+    width = len(array)
+    mem = np.repeat(np.array(array, dtype=np.int64)[:, None], n_lanes, axis=1)
+    mem[1] = nouns
+    mem[2] = verbs
+
+    ok = np.ones(n_lanes, dtype=bool)
+    lanes = np.arange(n_lanes)
+
+    for pos in range(0, width - width % 4, 4):
+        if not len(lanes):
+            break
+        rows = slice(None) if len(lanes) == n_lanes else lanes
+        ops = mem[pos, rows]
+        op = ops[0]
+
+        args = mem[pos + 1:pos + 4, rows] if op in (1, 2) else None
+        uniform = ops == op
+        if args is not None:
+            uniform &= ((args >= 0) & (args < width)).all(axis=0)
+
+        if not uniform.all():
+            for lane in lanes[~uniform]:
+                ok[lane] = finish_lane(mem, lane, pos)
+            lanes = lanes[uniform]
+            if not len(lanes):
+                break
+            rows = lanes
+            args = args[:, uniform] if args is not None else None
+
+        if op == 99:
+            break
+        if op not in FUNCTIONS:
+            ok[lanes] = False
+            break
+
+        if (args == args[:, :1]).all():  # Same addresses in every lane: whole-row operation
+            src_a, src_b, dest = args[:, 0].tolist()
+            a, b = mem[src_a, rows], mem[src_b, rows]
+            mem[dest, rows] = a + b if op == 1 else a * b
+        else:
+            a, b = mem[args[0], lanes], mem[args[1], lanes]
+            mem[args[2], lanes] = a + b if op == 1 else a * b
+
+    return mem[0].copy(), ok
+
+
+def finish_lane(mem, lane, pos):
+    lane_array = mem[:, lane].tolist()
+    try:
+        lane_array = run_program(lane_array, start=pos)
+    except (KeyError, IndexError):
+        return False
+
+    mem[:, lane] = lane_array
+    return True
+
+
+def search_batch(target=DESIRED_OUT):
+    nouns, verbs = np.divmod(np.arange((MAX_INPUT + 1) ** 2), MAX_INPUT + 1)
+    results, ok = run_batch(get_array(), nouns, verbs)
+
+    found = np.flatnonzero(ok & (results == target))
+    if not len(found):
+        return None
+    return int(nouns[found[0]]), int(verbs[found[0]])
+
+
+@overridden(globals(), VERBOSE=False)
+def benchmark():
+    n_candidates = (MAX_INPUT + 1) ** 2
+    nouns, verbs = np.divmod(np.arange(n_candidates), MAX_INPUT + 1)
+    array = get_array()
+
+    t0 = time.perf_counter()
+    for noun, verb in zip(nouns.tolist(), verbs.tolist()):
+        lane_array = array[:]
+        lane_array[1] = noun
+        lane_array[2] = verb
+        run_program(lane_array)
+    scalar_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    run_batch(array, nouns, verbs)
+    batch_time = time.perf_counter() - t0
+
+    print(f'Scalar: {n_candidates} candidates in {scalar_time:.3f}s ({n_candidates / scalar_time:,.0f} candidates/s)')
+    print(f'Batch:  {n_candidates} candidates in {batch_time:.3f}s ({n_candidates / batch_time:,.0f} candidates/s)')
+
+
 def main():
+    if SYMBOLIC or BATCH:
+        if SYMBOLIC:
+            print(f'array[0] = {get_symbolic_output(get_array())}')
+            solution = solve_symbolic(get_array(), target=DESIRED_OUT)
+        else:
+            solution = search_batch(target=DESIRED_OUT)
+
+        if solution is None:
+            print(f'No noun and verb in 0..{MAX_INPUT} give {DESIRED_OUT}')
+            return
+        noun, verb = solution
+        print('Noun {}, verb {}, result={}. (value={})'.format(noun, verb, DESIRED_OUT, noun * 100 + verb))
+        return
+
     i = 0
     for noun in range(99):
         for verb in range(99):
             i += 1
-            array = [1, 0, 0, 3, 1, 1, 2, 3, 1, 3, 4, 3, 1, 5, 0, 3, 2, 1, 10, 19, 1, 9, 19, 23, 1, 13, 23, 27, 1, 5, 27, 31, 2,
-                     31, 6, 35, 1, 35, 5, 39, 1, 9, 39, 43, 1, 43, 5, 47, 1, 47, 5, 51, 2, 10, 51, 55, 1, 5, 55, 59, 1, 59, 5,
-                     63, 2, 63, 9, 67, 1, 67, 5, 71, 2, 9, 71, 75, 1, 75, 5, 79, 1, 10, 79, 83, 1, 83, 10, 87, 1, 10, 87, 91, 1,
-                     6, 91, 95, 2, 95, 6, 99, 2, 99, 9, 103, 1, 103, 6, 107, 1, 13, 107, 111, 1, 13, 111, 115, 2, 115, 9, 119,
-                     1, 119, 6, 123, 2, 9, 123, 127, 1, 127, 5, 131, 1, 131, 5, 135, 1, 135, 5, 139, 2, 10, 139, 143, 2, 143,
-                     10, 147, 1, 147, 5, 151, 1, 151, 2, 155, 1, 155, 13, 0, 99, 2, 14, 0, 0]
+            array = get_array()
             array[1] = noun
             array[2] = verb
             array = run_program(array)
@@ -75,6 +412,15 @@ def main():
                 exit(0)
 
 
+def get_array():
+    return [1, 0, 0, 3, 1, 1, 2, 3, 1, 3, 4, 3, 1, 5, 0, 3, 2, 1, 10, 19, 1, 9, 19, 23, 1, 13, 23, 27, 1, 5, 27, 31, 2,
+            31, 6, 35, 1, 35, 5, 39, 1, 9, 39, 43, 1, 43, 5, 47, 1, 47, 5, 51, 2, 10, 51, 55, 1, 5, 55, 59, 1, 59, 5,
+            63, 2, 63, 9, 67, 1, 67, 5, 71, 2, 9, 71, 75, 1, 75, 5, 79, 1, 10, 79, 83, 1, 83, 10, 87, 1, 10, 87, 91, 1,
+            6, 91, 95, 2, 95, 6, 99, 2, 99, 9, 103, 1, 103, 6, 107, 1, 13, 107, 111, 1, 13, 111, 115, 2, 115, 9, 119,
+            1, 119, 6, 123, 2, 9, 123, 127, 1, 127, 5, 131, 1, 131, 5, 135, 1, 135, 5, 139, 2, 10, 139, 143, 2, 143,
+            10, 147, 1, 147, 5, 151, 1, 151, 2, 155, 1, 155, 13, 0, 99, 2, 14, 0, 0]
+
+
 def test():
     array = [1, 9, 10, 3, 2, 3, 11, 0, 99, 30, 40, 50]
     array = run_program(array)
@@ -84,5 +430,7 @@ def test():
 if __name__ == '__main__':
     if TEST:
         test()
+    elif BENCHMARK:
+        benchmark()
     else:
         main()
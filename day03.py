@@ -1,5 +1,21 @@
+import bisect
+import random
+import time
+
+from lib import overridden
+
 TEST = True
 
+SEGMENTS = True
+
+BENCHMARK = False
+
+VERBOSE = True
+
+PACK_BITS = 32
+PACK_OFFSET = 1 << (PACK_BITS - 1)
+PACK_MASK = (1 << PACK_BITS) - 1
+
 
 class Coord:
     def __init__(self, x, y, n=0):
@@ -27,19 +43,129 @@ class Coord:
 DIR_V = {'R': Coord(1, 0), 'L': Coord(-1, 0), 'U': Coord(0, 1), 'D': Coord(0, -1)}
 
 
+class Segment:
+    def __init__(self, x, y, direction, length, steps):
+        self.x0, self.y0 = x, y
+        self.x1, self.y1 = x + direction.x * length, y + direction.y * length
+        self.steps = steps  # Wire length walked before this segment starts
+        self.horizontal = direction.y == 0
+
+    @property
+    def level(self):
+        """Fixed coordinate: y for horizontal segments, x for vertical ones."""
+        return self.y0 if self.horizontal else self.x0
+
+    @property
+    def span(self):
+        """(min, max) of the varying coordinate."""
+        a, b = (self.x0, self.x1) if self.horizontal else (self.y0, self.y1)
+        return (a, b) if a <= b else (b, a)
+
+    def steps_to(self, x, y):
+        return self.steps + abs(x - self.x0) + abs(y - self.y0)
+
+    def __repr__(self):
+        return f'({self.x0}, {self.y0})->({self.x1}, {self.y1}){{{self.steps}}}'
+
+
+class SegmentIndex:
+    """Segments of one wire sorted by their fixed coordinate, for range queries."""
+
+    def __init__(self, segments):
+        self.horizontal = sorted((s for s in segments if s.horizontal), key=lambda s: s.level)
+        self.vertical = sorted((s for s in segments if not s.horizontal), key=lambda s: s.level)
+        self.horizontal_levels = [s.level for s in self.horizontal]
+        self.vertical_levels = [s.level for s in self.vertical]
+
+    def between(self, horizontal, lo, hi):
+        segments, levels = (self.horizontal, self.horizontal_levels) if horizontal else \
+            (self.vertical, self.vertical_levels)
+        return segments[bisect.bisect_left(levels, lo):bisect.bisect_right(levels, hi)]
+
+
+def get_segments(path):
+    segments = []
+    x = y = steps = 0
+    for segment in path.strip().split(','):
+        direction = DIR_V[segment[0]]
+        length = int(segment[1:])
+        s = Segment(x, y, direction, length, steps)
+        segments.append(s)
+        x, y = s.x1, s.y1
+        steps += length
+    return segments
+
+
+def get_crossings(wire_a, wire_b):
+    """Yield (x, y, combined steps) where two wires cross, leaving the origin out.
+
+    Perpendicular segments cross in a single point. Collinear overlaps yield only the points where
+    the distance to the origin or the combined steps can be minimal: overlap ends, segment starts and
+    the cells around the origin, which itself does not count.
+    """
+    index_b = SegmentIndex(wire_b)
+
+    for a in wire_a:
+        lo, hi = a.span
+        for b in index_b.between(not a.horizontal, lo, hi):
+            b_lo, b_hi = b.span
+            if b_lo <= a.level <= b_hi:
+                x, y = (b.level, a.level) if a.horizontal else (a.level, b.level)
+                yield x, y, a.steps_to(x, y) + b.steps_to(x, y)
+
+        for b in index_b.between(a.horizontal, a.level, a.level):
+            b_lo, b_hi = b.span
+            overlap_lo, overlap_hi = max(lo, b_lo), min(hi, b_hi)
+            if overlap_lo > overlap_hi:
+                continue
+            starts = (a.x0, b.x0) if a.horizontal else (a.y0, b.y0)
+            for v in {overlap_lo, overlap_hi, -1, 0, 1, *starts}:
+                v = min(max(v, overlap_lo), overlap_hi)
+                x, y = (v, a.level) if a.horizontal else (a.level, v)
+                yield x, y, a.steps_to(x, y) + b.steps_to(x, y)
+
+
+def find_closest_crossings(paths):
+    """Smallest Manhattan distance to the origin and smallest combined steps among the crossings."""
+    wire_a, wire_b = (get_segments(p) for p in paths)
+    distance = steps = None
+    for x, y, crossing_steps in get_crossings(wire_a, wire_b):
+        if x == 0 and y == 0:
+            continue
+        d = abs(x) + abs(y)
+        distance = d if distance is None else min(distance, d)
+        steps = crossing_steps if steps is None else min(steps, crossing_steps)
+    return distance, steps
+
+
+def pack(x, y):
+    return (x + PACK_OFFSET) << PACK_BITS | (y + PACK_OFFSET)
+
+
+def unpack(key):
+    return (key >> PACK_BITS) - PACK_OFFSET, (key & PACK_MASK) - PACK_OFFSET
+
+
 def get_coords(path):
-    last_segment = Coord(0, 0)
-    coords = {last_segment: 0}
+    """Every cell the wire visits, as packed coordinate -> steps of the first visit."""
+    x = y = steps = 0
+    coords = {pack(0, 0): 0}
     for segment in path.split(','):
-        print(segment)
+        if VERBOSE:
+            print(segment)
         direction = DIR_V[segment[0]]
         length = int(segment[1:])
         for step in range(1, length + 1):
-            step_coord = last_segment + direction
-            coords[step_coord] = 0
-            print(step_coord, end=', ')
-            last_segment = step_coord
-        print()
+            x += direction.x
+            y += direction.y
+            steps += 1
+            key = pack(x, y)
+            if key not in coords:
+                coords[key] = steps
+            if VERBOSE:
+                print(f'({x}, {y}){{{steps}}}', end=', ')
+        if VERBOSE:
+            print()
     return coords
 
 
@@ -57,30 +183,56 @@ def get_test_set():
     return paths
 
 
+def get_synthetic_set(n_segments, max_length, seed=3):
+    rng = random.Random(seed)
+    return [','.join(f'{rng.choice("RLUD")}{rng.randint(1, max_length)}' for _ in range(n_segments))
+            for _ in range(2)]
+
+
+@overridden(globals(), VERBOSE=False)
+def benchmark():
+    for n_segments, max_length, points in [(300, 1000, True), (300, 1000000, False), (20000, 1000000, False)]:
+        paths = get_synthetic_set(n_segments, max_length)
+        t0 = time.perf_counter()
+        distance, steps = find_closest_crossings(paths)
+        elapsed = time.perf_counter() - t0
+        print(f'{n_segments} segments up to {max_length} units: distance={distance} steps={steps}, '
+              f'segments {elapsed:.3f}s', end='')
+
+        if points:
+            t0 = time.perf_counter()
+            coords = [get_coords(p) for p in paths]
+            intersections = (coords[0].keys() & coords[1].keys()) - {pack(0, 0)}
+            min(coords[0][k] + coords[1][k] for k in intersections)
+            print(f', unit steps {time.perf_counter() - t0:.3f}s', end='')
+        print()
+
+
 def main():
     paths = get_test_set() if TEST else get_main_set()
 
-    coords = [get_coords(p) for p in paths]
-
-    intersections = set(coords[0].keys()) & set(coords[1].keys())
+    if SEGMENTS:
+        distance, steps = find_closest_crossings(paths)
+        print('Result')
+        print(f'Closest crossing at distance {distance}, fewest combined steps {steps}')
+        return
 
-    total_wire = {}
-    for inter in intersections:
-        x0 = min([x for x in coords[0].keys() if x == inter], key=lambda x: x.n)
-        x1 = min([x for x in coords[1].keys() if x == inter], key=lambda x: x.n)
+    coords = [get_coords(p) for p in paths]
 
-        value = x0.n + x1.n
+    intersections = (coords[0].keys() & coords[1].keys()) - {pack(0, 0)}
 
-        if value:
-            total_wire[inter] = x0.n + x1.n
+    total_wire = {inter: coords[0][inter] + coords[1][inter] for inter in intersections}
 
     print('Result')
     shortest = min(total_wire.values())
 
     for k, v in total_wire.items():
         if v == shortest:
-            print(k, '->', v)
+            print(unpack(k), '->', v)
 
 
 if __name__ == '__main__':
-    main()
+    if BENCHMARK:
+        benchmark()
+    else:
+        main()
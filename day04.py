@@ -1,5 +1,19 @@
+import functools
+import itertools
+import time
+
+from lib import overridden
+
 TEST = True
 
+COMBINATORIAL = True
+
+BENCHMARK = False
+
+VERBOSE = True
+
+RANGE = 356260, 846304
+
 
 def has_adjacent_repetitions(n):
     digits = str(n)
@@ -11,7 +25,8 @@ def has_adjacent_repetitions(n):
             break
     else:
         ok = False
-    print(n, ok)
+    if VERBOSE:
+        print(n, ok)
     return ok
 
 
@@ -28,11 +43,112 @@ def all_happen(fs, n):
     return True
 
 
+def non_decreasing_numbers(lo, hi):
+    """Yield, in increasing order, the numbers in [lo, hi) whose digits never decrease.
+
+    Only C(n + 8, 8) digit sequences exist per length n, instead of the 10^n numbers of the range.
+    """
+    for length in range(len(str(lo)), len(str(hi)) + 1):
+        for digits in itertools.combinations_with_replacement(range(1, 10), length):
+            n = int(''.join(map(str, digits)))
+            if n >= hi:
+                return
+            if n >= lo:
+                yield n
+
+
+def has_pair(n, exact_pair=True):
+    """Whether a number with non-decreasing digits repeats a digit exactly twice (or at least twice)."""
+    digits = str(n)
+    counts = [digits.count(d) for d in set(digits)]
+    return 2 in counts if exact_pair else max(counts) >= 2
+
+
+def valid_passwords(lo, hi, exact_pair=True):
+    return (n for n in non_decreasing_numbers(lo, hi) if has_pair(n, exact_pair))
+
+
+def count_valid_passwords(lo, hi, exact_pair=True):
+    """Number of valid passwords in [lo, hi), counted with a digit DP instead of enumerating them."""
+    return _count_valid_up_to(hi - 1, exact_pair) - _count_valid_up_to(lo - 1, exact_pair)
+
+
+def _count_valid_up_to(n, exact_pair):
+    if n <= 0:
+        return 0
+    bound = [int(d) for d in str(n)]
+
+    def closes_pair(run):
+        return run == 2 if exact_pair else run >= 2
+
+    @functools.lru_cache(maxsize=None)
+    def completions(remaining, prev, run, paired):
+        """Ways to append remaining non-decreasing digits after prev, the current group being run long (3 = 3+)."""
+        if remaining == 0:
+            return int(paired or closes_pair(run))
+        total = completions(remaining - 1, prev, min(run + 1, 3), paired)
+        for d in range(prev + 1, 10):
+            total += completions(remaining - 1, d, 1, paired or closes_pair(run))
+        return total
+
+    # Shorter numbers are never above the bound
+    total = sum(completions(length - 1, d, 1, False) for length in range(1, len(bound)) for d in range(1, 10))
+
+    prev, run, paired = None, 0, False
+    for i, b in enumerate(bound):
+        remaining = len(bound) - i - 1
+        for d in range(1 if prev is None else prev, b):
+            if d == prev:
+                total += completions(remaining, d, min(run + 1, 3), paired)
+            else:
+                total += completions(remaining, d, 1, paired or prev is not None and closes_pair(run))
+
+        if prev is not None and b < prev:
+            return total
+        if b == prev:
+            run = min(run + 1, 3)
+        else:
+            paired = paired or prev is not None and closes_pair(run)
+            prev, run = b, 1
+
+    return total + int(paired or closes_pair(run))
+
+
+@overridden(globals(), VERBOSE=False)
+def benchmark():
+    lo, hi = RANGE
+    functions = [has_adjacent_repetitions, digits_not_decrease]
+
+    t0 = time.perf_counter()
+    n_filter = sum(1 for n in range(lo, hi) if all_happen(functions, n))
+    print(f'Filter loop:   {n_filter} in {time.perf_counter() - t0:.3f}s')
+
+    t0 = time.perf_counter()
+    n_generated = sum(1 for _ in valid_passwords(lo, hi))
+    print(f'Generator:     {n_generated} in {time.perf_counter() - t0:.3f}s')
+
+    t0 = time.perf_counter()
+    n_counted = count_valid_passwords(lo, hi)
+    print(f'Digit DP:      {n_counted} in {time.perf_counter() - t0:.6f}s')
+
+    t0 = time.perf_counter()
+    n_counted = count_valid_passwords(10 ** 11, 10 ** 15)
+    print(f'Digit DP (12 to 15 digits): {n_counted} in {time.perf_counter() - t0:.6f}s')
+
+
 def main():
+    lo, hi = RANGE
+    if COMBINATORIAL:
+        values = list(valid_passwords(lo, hi))
+        print(len(values), values)
+        print(min(values), max(values))
+        print(f'Counted without enumerating: {count_valid_passwords(lo, hi)}')
+        return
+
     values = []
     functions = [has_adjacent_repetitions, digits_not_decrease]
 
-    for n in range(356260, 846304):
+    for n in range(lo, hi):
         if all_happen(functions, n):
             values.append(n)
     print(len(values), values)
@@ -40,4 +156,7 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    if BENCHMARK:
+        benchmark()
+    else:
+        main()
@@ -1,7 +1,14 @@
-import pandas as pd
+from array import array
+
+import numpy as np
 
 CENTER_OF_MASS = 'COM'
 
+ORBIT_MAP = True
+
+# WORD_MASKS[n] keeps the first n bytes of a big-endian uint64 word
+WORD_MASKS = np.array([~np.uint64(0) ^ np.uint64((1 << 8 * (8 - n)) - 1) for n in range(9)], dtype=np.uint64)
+
 
 class Planet:
     def __init__(self, name, orbiting_around=None):
@@ -15,10 +22,167 @@ class Planet:
         return f'{self.orbiting_around.name} <- {self.name} <- {[o.name for o in self.orbiters]}'
 
 
-def load_dataset(test=True):
-    filename = 'input06_test.txt' if test else 'input06.txt'
+class OrbitMap:
+    """Orbit tree as an array of parent ids (-1 for bodies orbiting nothing), with an ancestor index.
+
+    up[k][i] is the 2^k-th ancestor of body i (roots point at themselves). The table and every depth
+    are built together by pointer doubling, one vectorized pass per level and independent of how deep
+    the tree is, so ancestor and common-ancestor queries take O(log n).
+    """
+
+    def __init__(self, parents, names):
+        self.parents = np.asarray(parents, dtype=np.int32)
+        self.names = np.asarray(names)
+        self.name_order = None
+        self.up, self.depth = self.build_ancestors(self.parents)
+
+    @classmethod
+    def from_edges(cls, edges):
+        """Build from (center, orbiting) name pairs."""
+        ids = {}
+        parents = array('i')
+
+        def intern(name):
+            if name not in ids:
+                ids[name] = len(parents)
+                parents.append(-1)
+            return ids[name]
+
+        for center, orbiting in edges:
+            center_id = intern(center)
+            parents[intern(orbiting)] = center_id
+
+        return cls(np.frombuffer(parents, dtype=np.int32), list(ids))
+
+    @classmethod
+    def from_file(cls, filename):
+        """Build from an A)B orbit file, memory-mapped and interned without a per-line Python loop."""
+        data = np.memmap(filename, dtype=np.uint8, mode='r').view(np.ndarray)
+        separators = np.flatnonzero(data == ord(')'))
+        newlines = np.flatnonzero(data == ord('\n'))
+        line_breaks = np.concatenate(([-1], newlines, [len(data)]))
+
+        line = np.searchsorted(newlines, separators)
+        starts = line_breaks[line] + 1
+        ends = line_breaks[line + 1]
+        ends -= (data[ends - 1] == ord('\r')) & (ends - 1 > separators)
+
+        ids, names = intern_names(data, np.concatenate((starts, separators + 1)),
+                                  np.concatenate((separators, ends)))
+        centers, orbiting = np.split(ids, 2)
+        parents = np.full(len(names), -1, dtype=np.int32)
+        parents[orbiting] = centers
+        return cls(parents, names)
+
+    @staticmethod
+    def build_ancestors(parents):
+        n = len(parents)
+        up = [np.where(parents < 0, np.arange(n, dtype=np.int32), parents)]
+        # Hops covered by the last jump: min(2^k, depth), as roots jump onto themselves for free
+        depth = (parents >= 0).astype(np.int64)
+
+        while True:
+            jump = up[-1]
+            depth = depth + depth[jump]
+            next_jump = jump[jump]
+            if np.array_equal(next_jump, jump):
+                break
+            up.append(next_jump)
+
+        return up, depth
+
+    @property
+    def total_orbits(self):
+        return int(self.depth.sum())
+
+    def get_id(self, names):
+        if self.name_order is None:
+            self.name_order = np.argsort(self.names, kind='stable')
+
+        keys = np.atleast_1d(names).astype(self.names.dtype.kind)
+        # Casting to the stored width truncates longer names, so those can never match
+        stored = keys.astype(self.names.dtype)
+        pos = np.searchsorted(self.names, stored, sorter=self.name_order)
+        ids = self.name_order[np.minimum(pos, len(self.names) - 1)]
+        missing = (self.names[ids] != stored) | (stored != keys)
+        if missing.any():
+            raise KeyError(keys[missing][0])
+        return ids.astype(np.int32)
+
+    def ancestor(self, nodes, hops):
+        nodes = np.array(nodes, dtype=np.int32)
+        hops = np.broadcast_to(np.asarray(hops), nodes.shape)
+        for k, jump in enumerate(self.up):
+            bit = (hops >> k) & 1 == 1
+            nodes = np.where(bit, jump[nodes], nodes)
+        return nodes
+
+    def lca(self, a, b):
+        """Lowest common ancestor of each pair of body ids (-1 when they are in different trees)."""
+        a, b = np.atleast_1d(a).astype(np.int32), np.atleast_1d(b).astype(np.int32)
+        da, db = self.depth[a], self.depth[b]
+        a = self.ancestor(a, np.maximum(da - db, 0))
+        b = self.ancestor(b, np.maximum(db - da, 0))
+
+        for jump in reversed(self.up):
+            differ = jump[a] != jump[b]
+            a = np.where(differ, jump[a], a)
+            b = np.where(differ, jump[b], b)
+
+        return np.where(a == b, a, np.where(self.up[0][a] == self.up[0][b], self.up[0][a], -1))
+
+    def transfers(self, a, b):
+        """Orbital transfers to move from the body a orbits to the body b orbits, for names or arrays of names.
+
+        Raises ValueError when a pair is in different orbit trees, or one of them orbits nothing.
+        """
+        a_ids, b_ids = self.get_id(a), self.get_id(b)
+        a_centers, b_centers = self.parents[a_ids], self.parents[b_ids]
+        for ids, centers in ((a_ids, a_centers), (b_ids, b_centers)):
+            if (centers < 0).any():
+                raise ValueError(f'{self.names[ids[np.flatnonzero(centers < 0)[0]]]} orbits nothing')
+
+        common = self.lca(a_centers, b_centers)
+        if (common < 0).any():
+            i = int(np.flatnonzero(common < 0)[0])
+            raise ValueError(f'{self.names[a_ids[i]]} and {self.names[b_ids[i]]} are not in the same orbit tree')
+        result = self.depth[a_centers] + self.depth[b_centers] - 2 * self.depth[common]
+        return result if np.ndim(a) else int(result[0])
+
+
+def intern_names(data, starts, ends):
+    """Integer id for each data[start:end] name, plus the sorted array of distinct names (bytes)."""
+    lengths = ends - starts
+    width = int(lengths.max(initial=1))
+    # Names are zero-padded to whole big-endian uint64 words, which sort like the bytes but much faster
+    columns = -(-width // 8) * 8
+    windows = np.lib.stride_tricks.sliding_window_view(np.concatenate((data, np.zeros(columns, np.uint8))), columns)
+    word_lengths = np.clip(lengths[:, None] - np.arange(0, columns, 8), 0, 8)
+    words = windows[starts].view('>u8').astype(np.uint64) & WORD_MASKS[word_lengths]
+
+    order = words[:, 0].argsort() if columns == 8 else np.lexsort(words.T[::-1])
+    words = words[order]
+    first = np.concatenate(([True], (words[1:] != words[:-1]).any(axis=1)))
+    ids = np.empty(len(words), dtype=np.int32)
+    ids[order] = np.cumsum(first, dtype=np.int32) - 1
+    return ids, words[first].astype('>u8').view(f'S{columns}').ravel()
+
+
+def get_filename(test=True):
+    return 'input/input06_test.txt' if test else 'input/input06.txt'
+
+
+def read_edges(filename):
+    """Stream (center, orbiting) name pairs from an A)B orbit file, one line at a time."""
+    with open(filename) as f:
+        for line in f:
+            center, sep, orbiting = line.rstrip().partition(')')
+            if sep:
+                yield center, orbiting
+
 
-    return pd.read_csv(filename, sep=')', header=None, names=['center', 'orbiting'])
+def load_dataset(test=True):
+    return read_edges(get_filename(test))
 
 
 def count_orbits(p: Planet):
@@ -31,10 +195,13 @@ def count_orbits(p: Planet):
 def main():
     com_system = {CENTER_OF_MASS: Planet(CENTER_OF_MASS, None)}
 
-    planets = load_dataset(test=False)
-    for _, values in planets.iterrows():
-        orbiting_around, name = values
+    if ORBIT_MAP:
+        orbit_map = OrbitMap.from_file(get_filename(test=False))
+        print(f'TOTAL: {orbit_map.total_orbits}')
+        print(f'TOTAL JUMPS from YOU to SAN: {orbit_map.transfers("YOU", "SAN")}')
+        return
 
+    for orbiting_around, name in load_dataset(test=False):
         if name not in com_system:
             com_system[name] = Planet(name)
 
@@ -1,9 +1,16 @@
+import argparse
+import asyncio
 import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 from intcode_computer import Computer
 
 FEEDBACK = True
 
+CHUNK_SIZE = 8
+
 
 def get_array(test=False):
     if test:
@@ -29,41 +36,129 @@ def get_array(test=False):
             1001, 9, 2, 9, 4, 9, 99]
 
 
-def main():
-    array = get_array()
-    phases_set = itertools.permutations(range(5, 10)) if FEEDBACK else itertools.permutations(range(5))
-    max_output = 0
-    sequence = None
+def get_phases_set():
+    return itertools.permutations(range(5, 10)) if FEEDBACK else itertools.permutations(range(5))
 
-    for phases in phases_set:
-        computers = {}
 
-        # Initialization
+def run_amplifiers(array, phases, verbose=False):
+    computers = {}
+
+    # Initialization
+    for i, phase in enumerate(phases):
+        # print(f'Launching amp {i} with phase {phase} (input={amp_input})')
+        c = Computer(array)
+        computers[i] = c
+        c.input.append(phase)
+
+    amp_output = 0
+    while True:
         for i, phase in enumerate(phases):
-            # print(f'Launching amp {i} with phase {phase} (input={amp_input})')
-            c = Computer(array)
-            computers[i] = c
-            c.input.append(phase)
-
-        amp_output = 0
-        while True:
-            for i, phase in enumerate(phases):
-                c = computers[i]
-                c.input.append(amp_output)
-                c.run()
-                amp_output = c.output.pop()
+            c = computers[i]
+            c.input.append(amp_output)
+            c.run()
+            amp_output = c.output.pop()
 
+            if verbose:
                 print(f'Launched amp {i} with phase {phase} (output={amp_output})')
 
-            if all([c.status == 'HALTED' for c in computers.values()]):
-                break
+        if all([c.status == 'HALTED' for c in computers.values()]):
+            break
+
+    return amp_output
+
+
+async def run_amplifiers_async(array, phases):
+    queues = [asyncio.Queue() for _ in phases]
+    for queue, phase in zip(queues, phases):
+        queue.put_nowait(phase)
+    queues[0].put_nowait(0)
 
-        chain_output = amp_output
+    computers = [Computer(array) for _ in phases]
+    await asyncio.gather(*(c.run_async(queues[i], queues[(i + 1) % len(queues)]) for i, c in enumerate(computers)))
+
+    # The last amp feeds the first one, which has already halted
+    return queues[0].get_nowait()
+
+
+async def search_async(array, phases_set):
+    phases_set = list(phases_set)
+    outputs = await asyncio.gather(*(run_amplifiers_async(array, phases) for phases in phases_set))
+
+    max_output, sequence = max(zip(outputs, phases_set))
+    n_amps = len(phases_set) * len(phases_set[0])
+    print(f'Tested {len(phases_set)} phase sequences ({n_amps} amps) in one event loop')
+    return max_output, sequence
+
+
+def search_sequential(array, phases_set):
+    max_output = 0
+    sequence = None
+
+    for phases in phases_set:
+        chain_output = run_amplifiers(array, phases, verbose=True)
         print(f'Tested phases {phases}. Result={chain_output}')
         if chain_output > max_output:
             max_output = chain_output
             sequence = phases
 
+    return max_output, sequence
+
+
+_worker_array = None
+
+
+def _init_worker(array):
+    global _worker_array
+    _worker_array = array
+
+
+def _search_chunk(phases_chunk):
+    t0 = time.perf_counter()
+    max_output, sequence = max((run_amplifiers(_worker_array, phases), phases) for phases in phases_chunk)
+    return os.getpid(), len(phases_chunk), time.perf_counter() - t0, max_output, sequence
+
+
+def search_parallel(array, phases_set, workers, chunk_size=CHUNK_SIZE):
+    phases_set = list(phases_set)
+    chunks = [phases_set[i:i + chunk_size] for i in range(0, len(phases_set), chunk_size)]
+
+    max_output = 0
+    sequence = None
+    worker_stats = {}
+
+    # The program is handed to every worker once, at start-up, instead of being pickled with each chunk.
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(array,)) as pool:
+        for pid, n, elapsed, chunk_output, chunk_sequence in pool.map(_search_chunk, chunks):
+            tested, busy = worker_stats.get(pid, (0, 0.))
+            worker_stats[pid] = tested + n, busy + elapsed
+            if chunk_output > max_output:
+                max_output = chunk_output
+                sequence = chunk_sequence
+
+    for pid, (tested, busy) in sorted(worker_stats.items()):
+        print(f'Worker {pid}: {tested} sequences in {busy:.3f}s ({tested / busy:.1f} sequences/s)')
+
+    return max_output, sequence
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search the amplifier phase sequence with the highest output.')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='spread the search over this many processes (0 runs it sequentially)')
+    parser.add_argument('--asyncio', action='store_true',
+                        help='run every amplifier chain concurrently in a single asyncio event loop')
+    args = parser.parse_args()
+
+    array = get_array()
+    phases_set = get_phases_set()
+
+    if args.asyncio:
+        max_output, sequence = asyncio.run(search_async(array, phases_set))
+    elif args.workers:
+        max_output, sequence = search_parallel(array, phases_set, args.workers)
+    else:
+        max_output, sequence = search_sequential(array, phases_set)
+
     print('-' * 43)
     print(f'Best sequence {sequence}. Result={max_output}')
 
@@ -1,19 +1,121 @@
+import argparse
+import sys
+
+import numpy as np
 
 N = 8
 
 W = 25
 H = 6
 
+VECTORIZED = True
+
+TRANSPARENT = 2
+
+# Layers handled per numpy pass, so memory-mapped images are decoded in bounded blocks
+BLOCK_BYTES = 1 << 24
+
 
 def load_dataset(test=False):
     is_test = '_test' if test else ''
-    filename = f'input{N:02d}{is_test}.txt'
+    filename = f'input/input{N:02d}{is_test}.txt'
 
     with open(filename) as f:
         pxs = f.readlines()[0]
     return pxs
 
 
+def load_layers(test=False, width=W, height=H):
+    """Memory-map the image as a (layers, height, width) array of ASCII digits, without reading it in."""
+    is_test = '_test' if test else ''
+    data = np.memmap(f'input/input{N:02d}{is_test}.txt', dtype=np.uint8, mode='r')
+    n_layers = len(data) // (width * height)  # Drops the trailing newline
+    return data[:n_layers * width * height].reshape(n_layers, height, width)
+
+
+def iter_blocks(layers):
+    """Consecutive blocks of layers as digit values, BLOCK_BYTES at a time."""
+    step = max(1, BLOCK_BYTES // layers[0].size) if len(layers) else 1
+    for i in range(0, len(layers), step):
+        yield np.asarray(layers[i:i + step]) - ord('0')
+
+
+def count_digits(layers):
+    """(layers, 10) array with the count of each digit in each layer."""
+    counts = []
+    for block in iter_blocks(layers):
+        n = len(block)
+        keys = block.reshape(n, -1) + 10 * np.arange(n)[:, None]
+        counts.append(np.bincount(keys.ravel(), minlength=10 * n).reshape(n, 10))
+    return np.concatenate(counts) if counts else np.zeros((0, 10), dtype=np.int64)
+
+
+def compose(layers):
+    """Visible image: the first non-transparent pixel of each position, front layer first."""
+    image = np.full(layers.shape[1:], TRANSPARENT, dtype=np.uint8)
+    for block in iter_blocks(layers):
+        opaque = block != TRANSPARENT
+        first = np.take_along_axis(block, opaque.argmax(axis=0)[None], axis=0)[0]
+        image = np.where(image == TRANSPARENT, first, image)
+        if not (image == TRANSPARENT).any():
+            break
+    return image
+
+
+def checksum(counts):
+    index_min = int(counts[:, 0].argmin())
+    return index_min, counts[index_min]
+
+
+class StreamDecoder:
+    """Composes an image and its checksum one layer at a time, keeping only O(W*H) state."""
+
+    def __init__(self, width=W, height=H, checksum=True):
+        self.shape = height, width
+        self.checksum = checksum  # Without it, reading can stop as soon as the image is opaque
+        self.image = np.full(height * width, TRANSPARENT, dtype=np.uint8)
+        self.transparent = np.ones(height * width, dtype=bool)
+        self.layers = 0
+        self.min_zeros_layer = None
+        self.min_zeros_counts = None
+
+    @property
+    def done(self):
+        return not self.checksum and not self.transparent.any()
+
+    def feed(self, layer):
+        """Add the next layer (a flat array of digit values) behind the ones already fed."""
+        if self.checksum:
+            counts = np.bincount(layer, minlength=10)
+            if self.min_zeros_counts is None or counts[0] < self.min_zeros_counts[0]:
+                self.min_zeros_layer, self.min_zeros_counts = self.layers, counts
+
+        if self.transparent.any():
+            np.copyto(self.image, layer, where=self.transparent)
+            self.transparent = self.image == TRANSPARENT
+        self.layers += 1
+
+    def get_image(self):
+        return self.image.reshape(self.shape)
+
+
+def decode_stream(f, width=W, height=H, checksum=True):
+    """Decode a SIF image from a binary stream, reading a single layer at a time."""
+    decoder = StreamDecoder(width, height, checksum)
+    buffer = bytearray(width * height)
+    layer = np.frombuffer(buffer, dtype=np.uint8)
+
+    while not decoder.done:
+        read = 0
+        while read < len(buffer) and (n := f.readinto(memoryview(buffer)[read:])):
+            read += n
+        if read < len(buffer):  # End of stream, or the trailing newline
+            break
+        decoder.feed(layer - ord('0'))
+
+    return decoder
+
+
 def get_layered(pxs):
     lc = 0
     i = 0
@@ -36,6 +138,40 @@ def get_layered(pxs):
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Decode the Space Image Format password image.')
+    parser.add_argument('source', nargs='?',
+                        help='stream the image layer by layer from this file (- for stdin)')
+    parser.add_argument('--image-only', action='store_true',
+                        help='skip the checksum, so streaming stops as soon as the image is opaque')
+    args = parser.parse_args()
+
+    if args.source:
+        if args.source == '-':
+            decoder = decode_stream(sys.stdin.buffer, checksum=not args.image_only)
+        else:
+            with open(args.source, 'rb') as f:
+                decoder = decode_stream(f, checksum=not args.image_only)
+        if not decoder.layers:
+            print(f'No complete {W}x{H} layer in {args.source}')
+            return
+        if decoder.checksum:
+            values = decoder.min_zeros_counts
+            print(f'Layer {decoder.min_zeros_layer} has {values[0]} zeros')
+            print(f'Layer {decoder.min_zeros_layer} has {values[1]} 1s and {values[2]} 2s '
+                  f'(prod={values[1] * values[2]})')
+        else:
+            print(f'Image composed from {decoder.layers} layer(s)')
+        print_image(decoder.get_image().ravel())
+        return
+
+    if VECTORIZED:
+        layers = load_layers()
+        index_min, values = checksum(count_digits(layers))
+        print(f'Layer {index_min} has {values[0]} zeros')
+        print(f'Layer {index_min} has {values[1]} 1s and {values[2]} 2s (prod={values[1] * values[2]})')
+        print_image(compose(layers).ravel())
+        return
+
     pixels = [int(x) for x in load_dataset()]
 
     layers = get_layered(pixels)
@@ -1,9 +1,21 @@
+import argparse
+import bisect
+import functools
 import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 from lib import Coord
 
 N = 10
 
+VISIBILITY_INDEX = True
+
+VAPORIZATION_PLAN = True
+
+CHUNK_SIZE = 256
+
 
 class Sky:
     Asteroid = '#'
@@ -76,6 +88,14 @@ class Sky:
     def get_asteroids_visibility(self):
         return {a: self.get_visible_asteroids(a) for a in self.asteroids.values()}
 
+    def get_positions(self):
+        return np.array([(a.x, a.y) for a in self.asteroids.values()], dtype=np.int64).reshape(-1, 2)
+
+    def get_visibility_counts(self, workers=0):
+        """Number of asteroids visible from each asteroid, without walking the grid."""
+        counts = count_visible(self.get_positions(), workers)
+        return dict(zip(self.asteroids.values(), counts.tolist()))
+
     def vaporize_n(self, orig, n=None):
         limit = len(self.asteroids) - 1 if n is None else min(n, len(self.asteroids) - 1)
         i = 0
@@ -109,6 +129,43 @@ class Sky:
 
         self.asteroids[a].c = n
 
+    def get_target_buckets(self, orig):
+        """Other asteroids grouped by exact direction from orig, clockwise from up, each nearest first."""
+        buckets = {}
+        for a in self.asteroids.values():
+            if a == orig:
+                continue
+            dx, dy = a.x - orig.x, a.y - orig.y
+            g = math.gcd(dx, dy)
+            buckets.setdefault((dx // g, dy // g), []).append((g, a))
+
+        directions = sorted(buckets, key=functools.cmp_to_key(compare_clockwise))
+        return [[a for _, a in sorted(buckets[d], key=lambda item: item[0])] for d in directions]
+
+    def vaporization_order(self, orig):
+        """Asteroids in the order the laser at orig vaporizes them: one per direction on each rotation."""
+        buckets = self.get_target_buckets(orig)
+        rotation = 0
+        while buckets:
+            for bucket in buckets:
+                yield bucket[rotation]
+            rotation += 1
+            buckets = [b for b in buckets if len(b) > rotation]
+
+    def get_nth_vaporized(self, orig, n):
+        """The n-th (from 1) asteroid vaporized from orig, found by counting whole rotations."""
+        buckets = self.get_target_buckets(orig)
+        sizes = sorted(len(b) for b in buckets)
+        if not 1 <= n <= sum(sizes):
+            raise IndexError(f'Only {sum(sizes)} asteroids can be vaporized')
+
+        rotation = 0
+        while n > (remaining := len(sizes) - bisect.bisect_right(sizes, rotation)):
+            n -= remaining
+            rotation += 1
+
+        return [b for b in buckets if len(b) > rotation][n - 1][rotation]
+
     @staticmethod
     def get_azimuth(orig: Coord, dest: Coord):
         diff = dest - orig
@@ -124,6 +181,49 @@ def load_dataset(test=False):
     return rows
 
 
+def count_visible_from(positions, i):
+    """Distinct reduced directions from asteroid i to all the others (np.unique hashes the packed keys)."""
+    d = positions - positions[i]
+    d = np.delete(d, i, axis=0)
+    g = np.gcd(d[:, 0], d[:, 1])
+    span = 2 * int(np.abs(d).max(initial=0)) + 1
+    return len(np.unique((d[:, 0] // g) * span + d[:, 1] // g))
+
+
+_worker_positions = None
+
+
+def _init_worker(positions):
+    global _worker_positions
+    _worker_positions = positions
+
+
+def _count_chunk(origins):
+    return [count_visible_from(_worker_positions, i) for i in origins]
+
+
+def count_visible(positions, workers=0, chunk_size=CHUNK_SIZE):
+    """Visible asteroid count for every asteroid, spread over a process pool when workers > 0."""
+    if not workers:
+        return np.array([count_visible_from(positions, i) for i in range(len(positions))], dtype=np.int64)
+
+    chunks = [range(i, min(i + chunk_size, len(positions))) for i in range(0, len(positions), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(positions,)) as pool:
+        counts = [n for chunk_counts in pool.map(_count_chunk, chunks) for n in chunk_counts]
+    return np.array(counts, dtype=np.int64)
+
+
+def compare_clockwise(a, b):
+    """Order two (dx, dy) directions clockwise from up (y grows downwards) with integer math only."""
+    half_a = a[0] < 0 or (a[0] == 0 and a[1] > 0)
+    half_b = b[0] < 0 or (b[0] == 0 and b[1] > 0)
+    if half_a != half_b:
+        return half_a - half_b
+
+    cross = a[0] * b[1] - a[1] * b[0]
+    return (cross < 0) - (cross > 0)
+
+
 def simplify_direction(c: Coord):
     if c.x == 0 and c.y == 0:
         return c
@@ -139,17 +239,28 @@ def simplify_direction(c: Coord):
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Find the best monitoring station and vaporize asteroids from it.')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='count visible asteroids in this many processes (0 counts them in this one)')
+    args = parser.parse_args()
+
     sky = Sky(load_dataset())
     print(sky)
     print(sky.asteroids)
 
-    n_vis = {k: len(v) for k, v in sky.get_asteroids_visibility().items()}
+    if VISIBILITY_INDEX:
+        n_vis = sky.get_visibility_counts(args.workers)
+    else:
+        n_vis = {k: len(v) for k, v in sky.get_asteroids_visibility().items()}
     max_vis = list({k: v for k, v in sorted(n_vis.items(), key=lambda item: item[1])}.keys())[-1]
     max_vis_n = n_vis[max_vis]
     print(f'The asteroid which has visibility of more other asteroids is {max_vis} ({max_vis_n}).')
 
-    latest_vaporized = sky.vaporize_n(max_vis, 200)
-    print(sky)
+    if VAPORIZATION_PLAN:
+        latest_vaporized = sky.get_nth_vaporized(max_vis, 200)
+    else:
+        latest_vaporized = sky.vaporize_n(max_vis, 200)
+        print(sky)
     print(f'Latest vaporized: {latest_vaporized}, res = {latest_vaporized.x * 100 + latest_vaporized.y}.')
 
 
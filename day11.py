@@ -1,11 +1,18 @@
 import math
 from enum import Enum
 
+from canvas import GridCanvas, TerminalRenderer
 from intcode_computer import Computer
 from lib import Coord
 
 N = 11
 
+LIVE = False  # Redraw the hull in place on an ANSI terminal while the robot paints it
+
+FPS = 30
+
+VERBOSE = not LIVE
+
 
 class Colour(Enum):
     Black = 0, '.'
@@ -36,44 +43,45 @@ class Orientation(Enum):
 class Canvas:
     RobotOrientation = {Orientation.Right: '>', Orientation.Up: '^', Orientation.Left: '<', Orientation.Down: 'v'}
 
-    CellSep = ''
-    RowSep = '\n'
     Margin = 0
     SpanX = 75
     SpanY = 75
 
-    PaintedCoords = {Coord(0, 0): Colour.Black}
+    Lut = GridCanvas.make_lut({colour.n: colour.c for colour in Colour}, unset=Colour.Black.c)
+
+    def __init__(self):
+        self.grid = GridCanvas()
+        self.robots = {}
+        self.paint(Coord(0, 0), Colour.Black)
 
     def get_repr_fixed(self):
         return self._get_repr_with_lims(- self.SpanX, self.SpanX, -self.SpanY, self.SpanY)
 
     def get_repr_margins(self):
-        x0 = min(c.x for c in self.PaintedCoords.keys()) - self.Margin
-        xf = max(c.x for c in self.PaintedCoords.keys()) + self.Margin
-        y0 = min(c.y for c in self.PaintedCoords.keys()) - self.Margin
-        yf = max(c.y for c in self.PaintedCoords.keys()) + self.Margin
-        return self._get_repr_with_lims(x0, xf, y0, yf)
+        x0, xf, y0, yf = self.grid.bounds
+        return self._get_repr_with_lims(x0 - self.Margin, xf + self.Margin, y0 - self.Margin, yf + self.Margin)
 
     def _get_repr_with_lims(self, x_0, x_f, y_0, y_f):
-        rows = []
-        for y in range(y_0, y_f + 1):
-            row = []
-            for x in range(x_0, x_f + 1):
-                c = Coord(x, y)
-                if c in self.Robots:
-                    row.append(self.RobotOrientation[self.Robots[c]])
-                elif c in self.PaintedCoords:
-                    row.append(self.PaintedCoords[c].c)
-                else:
-                    row.append(Colour.Black.c)
-            rows.append(self.CellSep.join(row))
-        return self.RowSep.join(reversed(rows))
+        return self.grid.render(self.Lut, (x_0, x_f, y_0, y_f), flip=True, overlay=self.get_overlay())
+
+    def get_overlay(self):
+        return {(c.x, c.y): self.RobotOrientation[o] for c, o in self.robots.items()}
+
+    def get_frame(self, bounds):
+        return self.grid.render_frame(self.Lut, bounds, flip=True, overlay=self.get_overlay())
 
     def paint(self, coord, color):
-        self.PaintedCoords[coord] = color
+        self.grid.paint(coord.x, coord.y, color.n)
+
+    def get_colour(self, coord):
+        return Colour.infer_color(self.grid.get(coord.x, coord.y, Colour.Black.n))
+
+    @property
+    def painted(self):
+        return len(self.grid)
 
     def update_robot_pos(self, pos, orientation):
-        self.Robots = {pos: orientation}
+        self.robots = {pos: orientation}
 
     def __repr__(self):
         return self.get_repr_margins()
@@ -90,22 +98,26 @@ class Robot:
         self.update_canvas_pos()
 
     def scan(self):
-        return self.canvas.PaintedCoords.get(self.pos, Colour.Black)
+        return self.canvas.get_colour(self.pos)
 
     def execute(self):
         scanned_colour = self.scan()
-        print(f'Scanned colour: {scanned_colour}')
+        if VERBOSE:
+            print(f'Scanned colour: {scanned_colour}')
         self.computer.input.append(scanned_colour.n)
         self.computer.run()
-        received_colour = Colour.infer_color(self.computer.output.pop(0))
-        received_rotation = Rotation(self.computer.output.pop(0))
+        colour, rotation = self.computer.output.drain(2)
+        received_colour = Colour.infer_color(colour)
+        received_rotation = Rotation(rotation)
 
-        print(f'Obtained from program: {received_colour}, {received_rotation}')
+        if VERBOSE:
+            print(f'Obtained from program: {received_colour}, {received_rotation}')
         self.paint(received_colour)
         self.move(received_rotation)
 
     def paint(self, color):
-        print(f'Painting {self.pos} into: {color}')
+        if VERBOSE:
+            print(f'Painting {self.pos} into: {color}')
         self.canvas.paint(self.pos, color)
         pass
 
@@ -127,11 +139,13 @@ class Robot:
         new_orientation = self.Orientations[new_index]
 
         self.orientation = new_orientation
-        print(f'Robot reoriented to {new_orientation} (turned {rotation})')
+        if VERBOSE:
+            print(f'Robot reoriented to {new_orientation} (turned {rotation})')
 
     def step_forward(self):
         self.pos = self.pos + self.orientation.value
-        print(f'Robot stepped to {self.pos}.')
+        if VERBOSE:
+            print(f'Robot stepped to {self.pos}.')
 
     def print_canvas(self):
         print(self.canvas)
@@ -172,14 +186,23 @@ def main():
     array = get_array()
     robot = Robot(Canvas(), Computer(array))
 
-    robot.canvas.PaintedCoords[Coord(0, 0)] = Colour.White
-
-    while not robot.computer.halted:
-        robot.execute()
+    robot.canvas.paint(Coord(0, 0), Colour.White)
+
+    if LIVE:
+        renderer = TerminalRenderer(max_fps=FPS)
+        # A fixed view, as a frame that changes size has to be redrawn in full
+        view = -Canvas.SpanX, Canvas.SpanX, -Canvas.SpanY, Canvas.SpanY
+        while not robot.computer.halted:
+            robot.execute()
+            renderer.draw(lambda: robot.canvas.get_frame(view), status=f'{robot}')
+        renderer.draw(robot.canvas.get_frame(view), status=f'{robot}', force=True)
+        renderer.close()
+    else:
+        while not robot.computer.halted:
+            robot.execute()
     robot.print_canvas()
 
-    colours = robot.canvas.PaintedCoords
-    print(len(colours), colours)
+    print(f'{robot.canvas.painted} panels painted')
 
 
 if __name__ == '__main__':
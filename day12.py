@@ -1,7 +1,20 @@
 import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 N = 12
 
+VECTORIZED = True
+
+STEPS = 1000
+
+PARALLEL_AXES = True
+
+# Bodies whose pairwise differences are taken in one numpy pass, to bound memory for large systems
+GRAVITY_BLOCK = 256
+
 
 class Coord3d:
     def __init__(self, components):
@@ -113,16 +126,84 @@ class Planet:
                         self.periods[xi] = i
 
                     if len(self.periods) == self.n_dims:
-                        lcd = 1
-                        for v in self.periods.values():
-                            lcd *= v
-
-                        print(f'Analysis completed. Iterations {self.periods.values()}. Forecast: {lcd}')
+                        lcm = math.lcm(*self.periods.values())
+                        print(f'Analysis completed. Iterations {self.periods.values()}. Forecast: {lcm}')
                         break
             if len(self.periods) == self.n_dims:
                 break
 
 
+class MoonSystem:
+    """Positions and velocities as (..., n_moons, n_dims) int64 arrays.
+
+    Leading dimensions hold independent systems, which are all stepped together.
+    """
+
+    def __init__(self, positions, velocities=None):
+        self.pos = np.array(positions, dtype=np.int64)
+        self.vel = np.zeros_like(self.pos) if velocities is None else np.array(velocities, dtype=np.int64)
+        self.steps = 0
+
+    def __repr__(self):
+        return f'After {self.steps} steps:\npos={self.pos.tolist()}\nvel={self.vel.tolist()}\nE = {self.energy}\n'
+
+    @property
+    def energy(self):
+        energy = (np.abs(self.pos).sum(axis=-1) * np.abs(self.vel).sum(axis=-1)).sum(axis=-1)
+        return int(energy) if energy.ndim == 0 else energy
+
+    def gravity(self, out=None):
+        """Velocity change of every moon: the sign of its difference to every other moon, summed."""
+        if out is None:
+            out = np.empty_like(self.pos)
+
+        n = self.pos.shape[-2]
+        for start in range(0, n, GRAVITY_BLOCK):
+            block = self.pos[..., start:start + GRAVITY_BLOCK, None, :]
+            np.sign(self.pos[..., None, :, :] - block).sum(axis=-2, out=out[..., start:start + GRAVITY_BLOCK, :])
+        return out
+
+    def step(self, n=1):
+        dv = np.empty_like(self.pos)
+        for _ in range(n):
+            self.vel += self.gravity(dv)
+            self.pos += self.vel
+        self.steps += n
+
+    def find_period(self):
+        """Steps until the system is back at its current state.
+
+        Each step is reversible, so the first repeated state is always the starting one, and there is no
+        need for Floyd/Brent: comparing against the initial state is enough, and velocities are checked first.
+        """
+        pos0, vel0 = self.pos.copy(), self.vel.copy()
+        dv = np.empty_like(self.pos)
+        steps = 0
+        while True:
+            self.vel += self.gravity(dv)
+            self.pos += self.vel
+            steps += 1
+            if np.array_equal(self.vel, vel0) and np.array_equal(self.pos, pos0):
+                self.steps += steps
+                return steps
+
+
+def find_axis_period(positions):
+    """Period of the 1-D system made of a single axis of every moon, starting at rest."""
+    return MoonSystem(np.asarray(positions)[:, None]).find_period()
+
+
+def find_period(positions, parallel=PARALLEL_AXES):
+    """Steps until the whole system repeats: axes move independently, so it is the lcm of their periods."""
+    axes = np.asarray(positions, dtype=np.int64).T
+    if parallel:
+        with ProcessPoolExecutor(max_workers=len(axes)) as pool:
+            periods = list(pool.map(find_axis_period, axes))
+    else:
+        periods = [find_axis_period(axis) for axis in axes]
+    return periods, math.lcm(*periods)
+
+
 def load_dataset(test=False):
     if test:
         return [(-1, 0, 2), (2, -10, -7), (4, -8, 8), (3, 5, -1)]
@@ -130,6 +211,15 @@ def load_dataset(test=False):
 
 
 def main():
+    if VECTORIZED:
+        system = MoonSystem(load_dataset())
+        system.step(STEPS)
+        print(system)
+
+        periods, period = find_period(load_dataset())
+        print(f'Axis periods {periods}. The system repeats after {period} steps')
+        return
+
     saturn = Planet(load_dataset(), ['Io', 'Europa', 'Ganymede', 'Callisto'])
     print(saturn)
 
@@ -1,7 +1,9 @@
+import argparse
 import math
 import time
 from enum import Enum
 
+from canvas import GridCanvas, TerminalRenderer
 from intcode_computer import Computer
 from lib import Coord
 
@@ -25,41 +27,41 @@ class Tile(Enum):
         return cls[inferred]
 
 
+TILES = {tile.n: tile for tile in Tile}
+
+
 class Canvas:
 
-    CellSep = ''
-    RowSep = '\n'
     Margin = 0
     SpanX = 20
     SpanY = 20
 
-    PaintedCoords = {}
+    Lut = GridCanvas.make_lut({tile.n: tile.c for tile in Tile}, unset=Tile.Empty.c)
+
+    def __init__(self):
+        self.grid = GridCanvas()
 
     def get_repr_fixed(self):
         return self._get_repr_with_lims(- self.SpanX, self.SpanX, -self.SpanY, self.SpanY)
 
     def get_repr_margins(self):
-        x0 = min(c.x for c in self.PaintedCoords.keys()) - self.Margin
-        xf = max(c.x for c in self.PaintedCoords.keys()) + self.Margin
-        y0 = min(c.y for c in self.PaintedCoords.keys()) - self.Margin
-        yf = max(c.y for c in self.PaintedCoords.keys()) + self.Margin
-        return self._get_repr_with_lims(x0, xf, y0, yf)
+        x0, xf, y0, yf = self.grid.bounds
+        return self._get_repr_with_lims(x0 - self.Margin, xf + self.Margin, y0 - self.Margin, yf + self.Margin)
 
     def _get_repr_with_lims(self, x_0, x_f, y_0, y_f):
-        rows = []
-        for y in range(y_0, y_f + 1):
-            row = []
-            for x in range(x_0, x_f + 1):
-                c = Coord(x, y)
-                if c in self.PaintedCoords:
-                    row.append(self.PaintedCoords[c].c)
-                else:
-                    row.append(Tile.Empty.c)
-            rows.append(self.CellSep.join(row))
-        return self.RowSep.join(rows)
-
-    def paint(self, coord, color):
-        self.PaintedCoords[coord] = color
+        return self.grid.render(self.Lut, (x_0, x_f, y_0, y_f))
+
+    def get_frame(self):
+        return self.grid.render_frame(self.Lut, margin=self.Margin)
+
+    def paint(self, coord, tile):
+        self.grid.paint(coord.x, coord.y, tile.n)
+
+    def find(self, tile):
+        return [Coord(x, y) for x, y in self.grid.find(tile.n)]
+
+    def count(self, tile):
+        return self.grid.count_of(tile.n)
 
     def __repr__(self):
         return self.get_repr_margins()
@@ -71,22 +73,30 @@ class Cabinet:
         self.canvas = canvas
         self.computer = computer
         self.score = None
+        self.paddle = None
+        self.ball = None
+        self.frames = 0
 
     def execute(self):
         self.computer.run()
+        self.frames += 1
 
-        for tile_info in self.chunks(self.computer.output, 3):
+        for tile_info in self.chunks(self.computer.output.drain(), 3):
             x, y, tile_str = tile_info
             if int(x) == -1 and int(y) == 0:
                 self.score = str(tile_str)
             else:
-                self.canvas.PaintedCoords[Coord(int(x), int(y))] = Tile.infer_color(tile_str)
+                tile = TILES[tile_str]
+                coord = Coord(int(x), int(y))
+                self.canvas.paint(coord, tile)
+                if tile is Tile.Paddle:
+                    self.paddle = coord
+                elif tile is Tile.Ball:
+                    self.ball = coord
 
     def choose_move_smart(self):
-        paddle = [coords for coords, tile in self.canvas.PaintedCoords.items() if tile == Tile.Paddle][0]
-        ball = [coords for coords, tile in self.canvas.PaintedCoords.items() if tile == Tile.Ball][0]
-
-        offset = ball.x - paddle.x
+        """Follow the ball, using the positions tracked from the output stream."""
+        offset = self.ball.x - self.paddle.x
         self.computer.input.append(offset // abs(offset) if offset else 0)
 
     @staticmethod
@@ -191,21 +201,57 @@ def get_array(test=False):
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Play the arcade game until every block is broken.')
+    parser.add_argument('--headless', action='store_true',
+                        help='never render, just play at VM speed')
+    parser.add_argument('--render-every', type=int, default=1, metavar='N',
+                        help='render one frame out of N (0 renders only the final frame)')
+    parser.add_argument('--live', action='store_true',
+                        help='redraw only the changed cells in place on an ANSI terminal')
+    parser.add_argument('--fps', type=int, default=30,
+                        help='frame-rate cap for --live (0 for no cap)')
+    parser.add_argument('--engine', choices=Computer.Engines, default=Computer.Engines[0],
+                        help='Intcode engine running the game')
+    args = parser.parse_args()
+    if args.headless and args.live:
+        parser.error('--headless never renders, so it cannot be combined with --live')
+    if args.render_every < 0:
+        parser.error('--render-every must be 0 or more')
+
     array = get_array()
     array[0] = 2
-    arcade = Cabinet(Canvas(), Computer(array))
+    arcade = Cabinet(Canvas(), Computer(array, engine=args.engine))
+    renderer = TerminalRenderer(max_fps=args.fps) if args.live else None
+
+    def render(force=False):
+        if renderer:
+            renderer.draw(arcade.canvas.get_frame, status=f'Score = {arcade.score}', force=force)
+        else:
+            print(arcade)
 
+    t0 = time.perf_counter()
     while not arcade.computer.halted:
         arcade.execute()
-        print(arcade)
+        if not args.headless and args.render_every and arcade.frames % args.render_every == 0:
+            render()
         arcade.choose_move_smart()
         #time.sleep(0.1)
-    print(arcade)
-
-    tiles = arcade.canvas.PaintedCoords
-    print(len(tiles), tiles)
+    elapsed = time.perf_counter() - t0
 
-    print(len([t for t in tiles.values() if t == Tile.Block]))
+    if renderer:
+        render(force=True)
+        renderer.close()
+        print(f'{renderer.frames} frames drawn, {renderer.dropped} dropped by the frame-rate cap')
+    elif not args.headless:
+        print(arcade)
+    else:
+        print(f'Score = {arcade.score}')
+
+    steps = arcade.computer.steps
+    print(f'{arcade.frames} frames in {elapsed:.3f}s ({arcade.frames / elapsed:,.0f} fps), '
+          f'{steps} instructions ({steps / elapsed:,.0f} instr/s)')
+    print(f'{len(arcade.canvas.grid)} tiles painted')
+    print(arcade.canvas.count(Tile.Block))
 
 
 if __name__ == '__main__':
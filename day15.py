@@ -1,8 +1,10 @@
 import math
 import random
 import time
+from collections import deque
 from enum import Enum
 
+from canvas import GridCanvas, TerminalRenderer
 from intcode_computer import Computer
 from lib import Coord
 
@@ -10,6 +12,14 @@ N = 15
 
 PART_1 = False
 
+FORK_EXPLORATION = True
+
+LIVE = False  # Redraw the explored map in place on an ANSI terminal during the exploration
+
+FPS = 30
+
+VERBOSE = not LIVE
+
 
 class AllDiscoveredError(Exception):
     pass
@@ -57,6 +67,23 @@ class Canvas:
 
     ExploredCoords = {Coord(0, 0): Status.MOVE_OK}
 
+    Lut = GridCanvas.make_lut({Status.WALL_HIT.value: '█', Status.MOVE_OK.value: '.', Status.OXYGEN.value: 'O'},
+                              unset='░')
+
+    def __init__(self):
+        # Mirror of ExploredCoords that live frames are rendered from without a per-cell Python loop
+        self.grid = GridCanvas()
+        for c, status in self.ExploredCoords.items():
+            self.grid.paint(c.x, c.y, status.value)
+
+    def mark(self, coord, status):
+        self.ExploredCoords[coord] = status
+        self.grid.paint(coord.x, coord.y, status.value)
+
+    def get_frame(self):
+        bounds = -self.SpanX, self.SpanX, -self.SpanY, self.SpanY
+        return self.grid.render_frame(self.Lut, bounds, flip=True, overlay={(self.RobotPos.x, self.RobotPos.y): 'X'})
+
     def get_repr_fixed(self):
         return self._get_repr_with_lims(- self.SpanX, self.SpanX, -self.SpanY, self.SpanY)
 
@@ -104,11 +131,11 @@ class Robot:
     def execute(self, direction):
         self.computer.input.append(direction.value)
         self.computer.run()
-        result = Status(self.computer.output.pop(0))
+        result = Status(self.computer.output.popleft())
 
         new_location = self.location + get_coord_from_dir(direction)
 
-        self.canvas.ExploredCoords[new_location] = result
+        self.canvas.mark(new_location, result)
 
         if result != Status.WALL_HIT:
             self.location = new_location
@@ -129,7 +156,7 @@ class Robot:
 
         self.computer.input.append(direction.value)
         self.computer.run()
-        result = Status(self.computer.output.pop(0))
+        result = Status(self.computer.output.popleft())
 
         if result is not Status.MOVE_OK:
             raise ValueError(f'Stepping back did not work (from {current_location} to {previous_location})')
@@ -148,7 +175,8 @@ class Robot:
 
         result = self.execute(direction)
         # print(result)
-        print(len(self.canvas.ExploredCoords))
+        if VERBOSE:
+            print(len(self.canvas.ExploredCoords))
         return result
 
     def __repr__(self):
@@ -168,13 +196,46 @@ class Robot:
                     c_iter = v + get_coord_from_dir(Direction(i))
                     try:
                         if self.canvas.ExploredCoords[c_iter] == Status.MOVE_OK:
-                            self.canvas.ExploredCoords[c_iter] = Status.OXYGEN
+                            self.canvas.mark(c_iter, Status.OXYGEN)
                             new_values.append(c_iter)
                     except KeyError:
                         continue
         return delta_t - 1  # last iteration will not fill any coordinate.
 
 
+def explore_with_forks(canvas: Canvas, computer: Computer, renderer=None):
+    """Breadth-first exploration forking the droid's computer at every cell instead of walking it back."""
+    oxygen = None
+    frontier = deque([(Coord(0, 0), 0, computer)])
+
+    while frontier:
+        location, distance, vm = frontier.popleft()
+        if renderer:
+            canvas.RobotPos = location
+            renderer.draw(canvas.get_frame, status=f'{len(canvas.ExploredCoords)} cells explored')
+        for direction in Direction:
+            new_location = location + get_coord_from_dir(direction)
+            if new_location in canvas.ExploredCoords:
+                continue
+
+            branch = vm.fork()
+            branch.input.append(direction.value)
+            branch.run()
+            result = Status(branch.output.popleft())
+
+            canvas.mark(new_location, result)
+            if result == Status.WALL_HIT:
+                continue
+
+            if result == Status.OXYGEN and oxygen is None:
+                oxygen = new_location, distance + 1
+            frontier.append((new_location, distance + 1, branch))
+
+    if renderer:
+        renderer.draw(canvas.get_frame, status=f'{len(canvas.ExploredCoords)} cells explored', force=True)
+    return oxygen
+
+
 def get_array(test=False):
     if test:
         return [3, 31, 4, 7, 4, 8, 99, 0, 1]
@@ -227,21 +288,42 @@ def main():
     array = get_array()
     robot = Robot(Canvas(), Computer(array))
 
+    renderer = TerminalRenderer(max_fps=FPS) if LIVE else None
+
+    if FORK_EXPLORATION:
+        oxygen, distance = explore_with_forks(robot.canvas, robot.computer, renderer)
+        if renderer:
+            renderer.close()
+        print(f'Oxygen system found at {oxygen}, {distance} movements away')
+    else:
+        explore_walking(robot, renderer)
+
+    t_o2 = robot.expand_oxygen()
+    print(robot)
+    print(f'Took {t_o2} minutes to fill the tank')
+
+
+def explore_walking(robot: Robot, renderer=None):
+    def draw(force=False):
+        if renderer:
+            renderer.draw(robot.canvas.get_frame, status=f'{len(robot.visited)} steps deep', force=force)
+            if force:
+                renderer.close()
+
     try:
         while not robot.computer.halted:
             result = robot.find_wise()
             # print(robot)
+            draw()
             if result == Status.OXYGEN and PART_1:
                 break
 
+        draw(force=True)
         print(len(robot.visited), robot.visited[0])
     except AllDiscoveredError:
+        draw(force=True)
         print(robot)
 
-    t_o2 = robot.expand_oxygen()
-    print(robot)
-    print(f'Took {t_o2} minutes to fill the tank')
-
 
 if __name__ == '__main__':
     main()
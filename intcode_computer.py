@@ -1,3 +1,29 @@
+import asyncio
+import json
+import time
+from array import array as array_type
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+ZERO_PAGE = array_type('q', bytes(8 * PAGE_SIZE))
+
+INSTRUCTION_LENGTHS = {1: 4, 2: 4, 3: 2, 4: 2, 5: 3, 6: 3, 7: 4, 8: 4, 9: 2, 99: 1}
+OPCODE_NAMES = {1: 'Sum', 2: 'Multiply', 3: 'Input', 4: 'Output', 5: 'JumpIfTrue', 6: 'JumpIfFalse',
+                7: 'LessThan', 8: 'Equal', 9: 'BaseAdjustment', 99: 'Halt'}
+DECODED_OPCODES = {}
+
+MAX_BLOCK_INSTRUCTIONS = 64
+MAX_CODE_INVALIDATIONS = 4
+COMPILED_SOURCES = {}
+
+# States returned by compiled blocks
+BLOCK_CONTINUE, BLOCK_WAIT, BLOCK_HALT, BLOCK_BLOCKED = range(4)
+BLOCK_STATUS = {BLOCK_WAIT: 'WAIT', BLOCK_HALT: 'HALTED', BLOCK_BLOCKED: 'BLOCKED'}
+
+
 class HaltException(Exception):
     pass
 
@@ -7,36 +33,143 @@ class EmptyInputException(Exception):
         pass  # print('Empty input... Awaiting')
 
 
+class FullOutputException(Exception):
+    pass
+
+
+class Channel(deque):
+    """Unbounded FIFO queue feeding a Computer's input or collecting its output."""
+
+    capacity = None
+
+    @property
+    def full(self):
+        return False
+
+    def drain(self, n=None):
+        """Remove and return the n oldest values (all of them by default) as a list."""
+        if n is None or n >= len(self):
+            values = list(self)
+            self.clear()
+            return values
+        return [self.popleft() for _ in range(n)]
+
+    def copy(self):
+        return type(self)(self)
+
+
+class BoundedChannel(Channel):
+    """Ring buffer holding at most capacity values.
+
+    A Computer writing to a full BoundedChannel pauses with status 'BLOCKED' and resumes the output
+    instruction on the next run(), once the consumer has made room. Every way of adding values raises
+    FullOutputException instead of going over capacity.
+    """
+
+    def __init__(self, capacity, iterable=()):
+        super().__init__()
+        self.capacity = capacity
+        self.extend(iterable)
+
+    @property
+    def full(self):
+        return len(self) >= self.capacity
+
+    def append(self, value):
+        if self.full:
+            raise FullOutputException
+        super().append(value)
+
+    def appendleft(self, value):
+        if self.full:
+            raise FullOutputException
+        super().appendleft(value)
+
+    def insert(self, i, value):
+        if self.full:
+            raise FullOutputException
+        super().insert(i, value)
+
+    def extend(self, iterable):
+        """Add all the values or, when they do not fit, none of them."""
+        values = list(iterable)
+        if len(self) + len(values) > self.capacity:
+            raise FullOutputException
+        super().extend(values)
+
+    def extendleft(self, iterable):
+        values = list(iterable)
+        if len(self) + len(values) > self.capacity:
+            raise FullOutputException
+        super().extendleft(values)
+
+    def __iadd__(self, iterable):
+        self.extend(iterable)
+        return self
+
+    def copy(self):
+        return type(self)(self.capacity, self)
+
+    __copy__ = copy
+
+    def __reduce__(self):
+        return type(self), (self.capacity, list(self))
+
+
 class Computer:
-    def __init__(self, array: list):
-        self.mem = {}
+    Engines = ('decoded', 'interpreted', 'compiled')
 
-        for i, v in enumerate(array):
-            self.mem[i] = Register(v)
+    def __init__(self, array: list, engine='decoded', inputs=None, outputs=None, profiler=None):
+        if engine not in self.Engines:
+            raise ValueError(f'Unknown engine {engine!r} (expected one of {self.Engines})')
+
+        self.mem = Memory(array)
 
         self.instruction_pointer = 0
 
-        self.input = []
+        self.input = Channel() if inputs is None else inputs
 
-        self.output = []
+        self.output = Channel() if outputs is None else outputs
 
         self.status = 'WAIT'
 
         self.halted = False
 
+        self.engine = engine
+
+        self.steps = 0
+
+        self.relative_base = 0
+
+        self.decoded = {}
+
+        self.compiler = None
+
+        self.profiler = profiler
+
         self.instructions = {i.n: i for i in [SumInstruction(), MultiplyInstruction(),
                              InputInstruction(self.input), OutputInstruction(self.output),
                              JumpIfTrueInstruction(), JumpIfFalseInstruction(),
                              LessThanInstruction(),  EqualInstruction(),
-                             BaseAdjustmentInstruction(),
+                             BaseAdjustmentInstruction(self),
                              HaltInstruction()]}
 
     def run(self):
+        if self.profiler is not None:
+            return self.run_profiled()
+        if self.engine == 'decoded':
+            return self.run_decoded()
+        if self.engine == 'compiled':
+            return self.run_compiled()
+        return self.run_interpreted()
+
+    def run_interpreted(self):
         self.status = 'RUNNING'
         try:
             while True:
                 #print_instruction(mem, instruction_pointer)
                 self.instruction_pointer = self.instruction_call()
+                self.steps += 1
                 # print(mem)
 
         except HaltException:
@@ -44,37 +177,536 @@ class Computer:
             self.halted = True
         except EmptyInputException:
             self.status = 'WAIT'
+        except FullOutputException:
+            self.status = 'BLOCKED'
+
+        return self.mem
+
+    def run_profiled(self):
+        """Interpret instruction by instruction, recording every step in the profiler."""
+        profiler = self.profiler
+        profiler.resume()
+
+        self.status = 'RUNNING'
+        try:
+            while True:
+                ip = self.instruction_pointer
+                op = self.mem[ip] % 100
+                self.instruction_pointer = self.instruction_call()
+                self.steps += 1
+                profiler.record(ip, op, self.instruction_pointer)
+
+        except HaltException:
+            profiler.record(ip, op, ip + 1)  # The halt raises before returning, and does not jump anywhere
+            self.status = 'HALTED'
+            self.halted = True
+        except EmptyInputException:
+            self.status = 'WAIT'
+            profiler.pause()
+        except FullOutputException:
+            self.status = 'BLOCKED'
 
         return self.mem
 
     def instruction_call(self):
-        n = self.mem[self.instruction_pointer].n % 100
-        return self.instructions[n].subcall(self.mem, self.instruction_pointer)
+        n = self.mem[self.instruction_pointer] % 100
+        return self.instructions[n].subcall(self.mem, self.instruction_pointer, self.relative_base)
+
+    def run_decoded(self):
+        """Run with opcodes decoded once per address, without building Instruction calls.
+
+        The decoded cache is keyed by address; writes landing on a decoded address drop its entry, so
+        self-modifying code is decoded again the next time it is reached.
+        """
+        read = self.mem.__getitem__
+        write = self.mem.__setitem__
+        decoded = self.decoded
+        inp = self.input
+        out = self.output
+        capacity = self.output.capacity
+        ip = self.instruction_pointer
+        rb = self.relative_base
+        steps = self.steps
 
+        self.status = 'RUNNING'
+        while True:
+            try:
+                op, m1, m2, m3 = decoded[ip]
+            except KeyError:
+                op, m1, m2, m3 = decoded[ip] = decode(read(ip))
+
+            if op == 1 or op == 2 or op == 7 or op == 8:
+                x = read(ip + 1 if m1 == 1 else read(ip + 1) + rb if m1 == 2 else read(ip + 1))
+                y = read(ip + 2 if m2 == 1 else read(ip + 2) + rb if m2 == 2 else read(ip + 2))
+                dest = ip + 3 if m3 == 1 else read(ip + 3) + rb if m3 == 2 else read(ip + 3)
+                if op == 1:
+                    write(dest, x + y)
+                elif op == 2:
+                    write(dest, x * y)
+                elif op == 7:
+                    write(dest, 1 if x < y else 0)
+                else:
+                    write(dest, 1 if x == y else 0)
+                if dest in decoded:
+                    del decoded[dest]
+                ip += 4
+            elif op == 5 or op == 6:
+                x = read(ip + 1 if m1 == 1 else read(ip + 1) + rb if m1 == 2 else read(ip + 1))
+                if (x != 0) == (op == 5):
+                    ip = read(ip + 2 if m2 == 1 else read(ip + 2) + rb if m2 == 2 else read(ip + 2))
+                else:
+                    ip += 3
+            elif op == 9:
+                rb += read(ip + 1 if m1 == 1 else read(ip + 1) + rb if m1 == 2 else read(ip + 1))
+                ip += 2
+            elif op == 4:
+                if capacity is not None and len(out) >= capacity:
+                    self.status = 'BLOCKED'
+                    break
+                out.append(read(ip + 1 if m1 == 1 else read(ip + 1) + rb if m1 == 2 else read(ip + 1)))
+                ip += 2
+            elif op == 3:
+                if not inp:
+                    self.status = 'WAIT'
+                    break
+                dest = ip + 1 if m1 == 1 else read(ip + 1) + rb if m1 == 2 else read(ip + 1)
+                write(dest, int(inp.popleft()))
+                if dest in decoded:
+                    del decoded[dest]
+                ip += 2
+            else:  # 99, decode() rejects anything else
+                self.status = 'HALTED'
+                self.halted = True
+                break
+            steps += 1
+
+        self.instruction_pointer = ip
+        self.relative_base = rb
+        self.steps = steps
 
-class Register:
-    def __init__(self, n):
-        super().__init__()
-        self.n = int(n)
+        return self.mem
 
-    def __int__(self):
-        return self.n
+    def run_compiled(self):
+        """Run basic blocks translated to Python functions, see BlockCompiler."""
+        if self.compiler is None:
+            self.compiler = BlockCompiler(self)
+        compiler = self.compiler
+        blocks = compiler.blocks
+        ip = self.instruction_pointer
+        rb = self.relative_base
+        steps = self.steps
 
-    def __repr__(self):
-        return f'<{self.n}>'
+        self.status = 'RUNNING'
+        while True:
+            try:
+                block = blocks[ip]
+            except KeyError:
+                if ip in compiler.interpreted:
+                    self.instruction_pointer, self.relative_base, self.steps = ip, rb, steps
+                    state = compiler.interpret_one()
+                    ip, rb, steps = self.instruction_pointer, self.relative_base, self.steps
+                    if state:
+                        break
+                    continue
+                block = compiler.compile(ip)
+                if block is None:
+                    continue
+
+            ip, rb, n, state = block(rb)
+            steps += n
+            if state:
+                break
+
+        self.instruction_pointer = ip
+        self.relative_base = rb
+        self.steps = steps
+        self.status = BLOCK_STATUS[state]
+        self.halted = state == BLOCK_HALT
 
+        return self.mem
 
-class Instruction:
+    async def run_async(self, inputs: asyncio.Queue, outputs: asyncio.Queue):
+        """Run until halted, awaiting values from inputs whenever the program reads and putting its outputs.
+
+        Outputs are forwarded every time the computer pauses; build it with outputs=BoundedChannel(1) to
+        forward each value as soon as it is written.
+        """
+        while True:
+            self.run()
+            for value in self.output.drain():
+                await outputs.put(value)
+
+            if self.halted:
+                break
+            if self.status == 'WAIT':
+                self.input.append(await inputs.get())
+            else:
+                await asyncio.sleep(0)
+
+        return self.mem
+
+    def fork(self):
+        """Clone a paused computer. Memory pages are shared copy-on-write, the rest of the state is copied."""
+        if self.status == 'RUNNING':
+            raise RuntimeError('Only a paused Computer can be forked')
+
+        clone = Computer((), engine=self.engine, inputs=self.input.copy(), outputs=self.output.copy())
+        clone.mem = self.mem.fork()
+        clone.instruction_pointer = self.instruction_pointer
+        clone.relative_base = self.relative_base
+        clone.status = self.status
+        clone.halted = self.halted
+        clone.steps = self.steps
+        clone.decoded = dict(self.decoded)
+        return clone
+
+    snapshot = fork
+
+
+class BlockCompiler:
+    """Translates straight-line runs of Intcode into Python functions for Computer.run_compiled.
+
+    A block starts at the address execution reaches and runs until a jump, a halt or
+    MAX_BLOCK_INSTRUCTIONS. Parameters are constants while the block is valid, so position-mode
+    cells are read straight from the memory pages. A block returns (ip, relative base,
+    instructions run, state).
+
+    Every address a block was compiled from is recorded in code. A write hitting one of them drops
+    the blocks built from it and leaves the running block, so self-modifying code is compiled
+    again. Addresses rewritten more than MAX_CODE_INVALIDATIONS times become volatile: parameters
+    stored there are read at run time, and instructions whose opcode is stored there are run by
+    the interpreter.
+    """
+
+    def __init__(self, computer: Computer):
+        self.computer = computer
+        self.blocks = {}
+        self.block_ends = {}
+        self.code = {}
+        self.invalidations = {}
+        self.volatile = set()
+        self.interpreted = set()
+
+        mem = computer.mem
+        self.namespace = {'P': mem.pages, 'O': mem.owned, 'rd': mem.__getitem__, 'wr': mem.__setitem__,
+                          'code': self.code, 'inv': self.invalidate,
+                          'inp': computer.input, 'out': computer.output, 'cap': computer.output.capacity}
+
+    def compile(self, start):
+        source = self.get_source(start)
+        if source is None:
+            self.interpreted.add(start)
+            return None
+
+        try:
+            code = COMPILED_SOURCES[source]
+        except KeyError:
+            code = COMPILED_SOURCES[source] = compile(source, f'<intcode block {start}>', 'exec')
+
+        exec(code, self.namespace)
+        block = self.blocks[start] = self.namespace.pop('block')
+        return block
+
+    def get_source(self, start):
+        mem = self.computer.mem
+        lines = []
+        ip = start
+        n = 0
+
+        while True:
+            try:
+                if ip in self.volatile:
+                    if n == 0:
+                        return None
+                    raise RuntimeError(f'Opcode at {ip} is rewritten at run time')
+                op, m1, m2, m3 = decode(mem[ip])
+            except RuntimeError:
+                if n == 0:
+                    raise
+                lines.append(f'return {ip}, rb, {n}, {BLOCK_CONTINUE}')
+                break
+            length = INSTRUCTION_LENGTHS[op]
+            args = [(mode, ip + i, mem[ip + i]) for i, mode in enumerate((m1, m2, m3)[:length - 1], start=1)]
+            next_ip = ip + length
+
+            if op in (1, 2, 7, 8):
+                x, y = self.read(*args[0]), self.read(*args[1])
+                value = {1: f'{x} + {y}', 2: f'{x} * {y}',
+                         7: f'1 if {x} < {y} else 0', 8: f'1 if {x} == {y} else 0'}[op]
+                lines.extend(self.write(*args[2], value, next_ip, n + 1))
+            elif op == 3:
+                lines.append(f'if not inp: return {ip}, rb, {n}, {BLOCK_WAIT}')
+                lines.extend(self.write(*args[0], 'int(inp.popleft())', next_ip, n + 1))
+            elif op == 4:
+                if self.computer.output.capacity is not None:
+                    lines.append(f'if len(out) >= cap: return {ip}, rb, {n}, {BLOCK_BLOCKED}')
+                lines.append(f'out.append({self.read(*args[0])})')
+            elif op == 9:
+                lines.append(f'rb += {self.read(*args[0])}')
+            elif op in (5, 6):
+                condition = self.read(*args[0]) if op == 5 else f'not {self.read(*args[0])}'
+                lines.append(f'if {condition}: return {self.read(*args[1])}, rb, {n + 1}, {BLOCK_CONTINUE}')
+                lines.append(f'return {next_ip}, rb, {n + 1}, {BLOCK_CONTINUE}')
+            else:
+                lines.append(f'return {ip}, rb, {n}, {BLOCK_HALT}')
+
+            for address in range(ip, next_ip):
+                if address not in self.volatile:
+                    self.code.setdefault(address, set()).add(start)
+            self.block_ends[start] = next_ip
+            n += 1
+            ip = next_ip
+
+            if op in (5, 6, 99):
+                break
+            if n == MAX_BLOCK_INSTRUCTIONS:
+                lines.append(f'return {ip}, rb, {n}, {BLOCK_CONTINUE}')
+                break
+
+        return 'def block(rb):\n' + '\n'.join(f'    {line}' for line in lines) + '\n'
+
+    def read(self, mode, pos, param):
+        if pos in self.volatile:
+            param = self.cell(pos)
+            if mode == 1:
+                return param
+            return f'rd({param} + rb)' if mode == 2 else f'rd({param})'
+
+        if mode == 1:
+            return repr(param)
+        if mode == 2:
+            return f'rd({param} + rb)'
+        return self.cell(param)
+
+    def write(self, mode, pos, param, value, next_ip, n):
+        exit_line = f'return {next_ip}, rb, {n}, {BLOCK_CONTINUE}'
+        if mode == 2 or mode == 0 and pos in self.volatile:
+            address = self.cell(pos) if pos in self.volatile else param
+            return [f'd = {address} + rb' if mode == 2 else f'd = {address}',
+                    f'wr(d, {value})',
+                    f'if d in code: inv(d); {exit_line}']
+
+        address = pos if mode == 1 else param
+        index, offset = address >> PAGE_BITS, address & PAGE_MASK
+        return [f'if {index} in O: P[{index}][{offset}] = {value}',
+                f'else: wr({address}, {value})',
+                f'if {address} in code: inv({address}); {exit_line}']
+
+    def cell(self, address):
+        """Expression reading a memory cell straight from its page."""
+        mem = self.computer.mem
+        if address >> PAGE_BITS not in mem.pages:
+            mem[address] = 0  # Pages are never dropped, so the expression stays valid
+        return f'P[{address >> PAGE_BITS}][{address & PAGE_MASK}]'
+
+    def invalidate(self, address):
+        self.invalidations[address] = self.invalidations.get(address, 0) + 1
+        if self.invalidations[address] > MAX_CODE_INVALIDATIONS:
+            self.volatile.add(address)
+
+        for start in self.code.pop(address, ()):
+            if self.blocks.pop(start, None) is None:
+                continue
+
+            for code_address in range(start, self.block_ends.pop(start)):
+                starts = self.code.get(code_address)
+                if starts is not None:
+                    starts.discard(start)
+                    if not starts:
+                        del self.code[code_address]
+
+    def interpret_one(self):
+        """Run the instruction at the computer's pointer through the Instruction interpreter."""
+        computer = self.computer
+        ip = computer.instruction_pointer
+        op, *modes = decode(computer.mem[ip])
+        length = INSTRUCTION_LENGTHS[op]
+
+        dest = None
+        if op in (1, 2, 3, 7, 8):
+            dest = Instruction.get_address(computer.mem, ip + length - 1, modes[length - 2], computer.relative_base)
+
+        try:
+            computer.instruction_pointer = computer.instruction_call()
+        except HaltException:
+            return BLOCK_HALT
+        except EmptyInputException:
+            return BLOCK_WAIT
+        except FullOutputException:
+            return BLOCK_BLOCKED
+
+        computer.steps += 1
+        if dest in self.code:
+            self.invalidate(dest)
+        return BLOCK_CONTINUE
 
-    RelativeBase = 0
 
+class Profiler:
+    """Execution profile of a Computer built with profiler=Profiler().
+
+    Records how often each opcode and address is executed, how long the computer sat waiting for
+    input between runs, and the taken backward jumps, which close the program's loops.
+    """
+
+    def __init__(self):
+        self.opcode_counts = {}
+        self.address_hits = {}
+        self.address_opcodes = {}
+        self.backward_jumps = {}
+        self.blocked_on_input = 0.
+        self.paused_at = None
+
+    def record(self, ip, op, next_ip):
+        self.opcode_counts[op] = self.opcode_counts.get(op, 0) + 1
+        self.address_hits[ip] = self.address_hits.get(ip, 0) + 1
+        self.address_opcodes[ip] = op
+        if next_ip <= ip:
+            self.backward_jumps[ip, next_ip] = self.backward_jumps.get((ip, next_ip), 0) + 1
+
+    def pause(self):
+        self.paused_at = time.perf_counter()
+
+    def resume(self):
+        if self.paused_at is not None:
+            self.blocked_on_input += time.perf_counter() - self.paused_at
+            self.paused_at = None
+
+    def hot_loops(self, n=10):
+        """The n loops (target..jump address) executing the most instructions."""
+        loops = []
+        for (source, target), iterations in self.backward_jumps.items():
+            instructions = sum(hits for address, hits in self.address_hits.items() if target <= address <= source)
+            loops.append({'start': target, 'end': source, 'iterations': iterations, 'instructions': instructions})
+        return sorted(loops, key=lambda loop: loop['instructions'], reverse=True)[:n]
+
+    def to_json(self, top=10):
+        return json.dumps({'opcodes': {OPCODE_NAMES.get(op, str(op)): n for op, n in sorted(self.opcode_counts.items())},
+                           'addresses': {str(a): n for a, n in sorted(self.address_hits.items())},
+                           'blocked_on_input_s': self.blocked_on_input,
+                           'hot_loops': self.hot_loops(top)}, indent=2)
+
+    def to_collapsed(self):
+        """Flamegraph collapsed stacks: every address under the innermost loop containing it."""
+        loops = sorted(((target, source) for source, target in self.backward_jumps), key=lambda l: l[1] - l[0])
+        lines = []
+        for address, hits in sorted(self.address_hits.items()):
+            frames = ['intcode']
+            loop = next(((start, end) for start, end in loops if start <= address <= end), None)
+            if loop is not None:
+                frames.append(f'loop_{loop[0]}-{loop[1]}')
+            frames.append(f'{OPCODE_NAMES.get(self.address_opcodes[address])}@{address}')
+            lines.append(f'{";".join(frames)} {hits}')
+        return '\n'.join(lines) + '\n'
+
+
+def run_many(computers, workers=None):
+    """Run independent computers until each of them halts or waits for input.
+
+    Every Computer keeps its own memory, instruction pointer, relative base and I/O, so they can be
+    spread over a thread pool (workers) or, by default, run one after another.
+    """
+    if workers is None:
+        for computer in computers:
+            computer.run()
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(Computer.run, computers))
+
+    return [computer.status for computer in computers]
+
+
+def run_interleaved(computers):
+    """Round-robin computers until all halt or none can make progress.
+
+    Computers are wired by sharing channels, e.g. Computer(array, inputs=previous.output).
+    """
+    while True:
+        progress = False
+        for computer in computers:
+            if computer.halted:
+                continue
+            steps = computer.steps
+            computer.run()
+            progress |= computer.steps != steps or computer.halted
+
+        if not progress:
+            break
+
+    return [computer.status for computer in computers]
+
+
+def decode(opx):
+    try:
+        return DECODED_OPCODES[opx]
+    except KeyError:
+        pass
+
+    access, opcode = divmod(opx, 100)
+    if opcode not in INSTRUCTION_LENGTHS:
+        raise RuntimeError(f'Unknown opcode {opcode} (from {opx})')
+    im3_im2, im1 = divmod(access, 10)
+    im3, im2 = divmod(im3_im2, 10)
+
+    decoded = DECODED_OPCODES[opx] = (opcode, im1, im2, im3)
+    return decoded
+
+
+class Memory:
+    """Intcode memory made of fixed-size pages of 64-bit ints.
+
+    Pages are only allocated when written, so programs addressing sparse high
+    locations do not pay for the gap. Unwritten cells read as 0.
+    Forked memories share their pages until one of them writes to a page.
+    """
+
+    def __init__(self, array=()):
+        self.pages = {}
+
+        for start in range(0, len(array), PAGE_SIZE):
+            page = array_type('q', (int(v) for v in array[start:start + PAGE_SIZE]))
+            page.extend(ZERO_PAGE[:PAGE_SIZE - len(page)])
+            self.pages[start >> PAGE_BITS] = page
+
+        self.owned = set(self.pages)
+
+    def __getitem__(self, address):
+        page = self.pages.get(address >> PAGE_BITS)
+        if page is None:
+            return 0
+        return page[address & PAGE_MASK]
+
+    def __setitem__(self, address, value):
+        index = address >> PAGE_BITS
+        if index in self.owned:
+            page = self.pages[index]
+        else:
+            page = self.pages.get(index)
+            page = self.pages[index] = ZERO_PAGE[:] if page is None else page[:]
+            self.owned.add(index)
+        page[address & PAGE_MASK] = value
+
+    def fork(self):
+        clone = Memory()
+        clone.pages = dict(self.pages)
+        # Every page is shared now, whichever side writes first gets its own copy.
+        self.owned.clear()
+        return clone
+
+    def __len__(self):
+        return (max(self.pages) + 1) << PAGE_BITS if self.pages else 0
+
+    def __repr__(self):
+        return f'<Memory: {len(self.pages)} pages of {PAGE_SIZE}>'
+
+
+class Instruction:
     def __init__(self, n, instruction_length):
         self.n = n
         self.instruction_length = instruction_length
 
 
     def get_reference_type(self, opx):
-        access, opcode = divmod(opx.n, 100)
+        access, opcode = divmod(opx, 100)
         im3_im2, im1 = divmod(access, 10)
         im3, im2, = divmod(im3_im2, 10)
         self.check_op(opcode)
@@ -84,62 +716,54 @@ class Instruction:
         if op != self.n:
             raise RuntimeError(f'{self.__class__.__name__} is {self.n}')
 
-    def __call__(self, mem, pos):
+    def __call__(self, mem, pos, relative_base=0):
         opx = mem[pos]
-        params = [mem[pos + i] for i in range(1, self.instruction_length)]
-        modes = self.get_reference_type(opx)[:len(params)]
-
-        for i, mode in enumerate(modes):
-            if mode != 1:
-                index = params[i].n + self.RelativeBase if mode == 2 else params[i].n
-                try:
-                    params[i] = mem[index]
-                except KeyError:
-                    mem[index] = Register(0)
-                    params[i] = mem[index]
+        modes = self.get_reference_type(opx)
+        # Every parameter is resolved to an address; an immediate parameter is addressed in place.
+        params = [self.get_address(mem, pos + i, modes[i - 1], relative_base)
+                  for i in range(1, self.instruction_length)]
         # print(f'{pos:3d}|Call {self.__class__.__name__}({opx}) with params {params} (modes={modes})')
 
-        ret = self.oper(params)
+        ret = self.oper(mem, params)
         return ret if ret is not None else self.std_return(pos)
 
     def std_return(self, pos):
         return pos + self.instruction_length
 
-    def oper(self, params):
+    def oper(self, mem, params):
         raise NotImplementedError("Inherit from this class to properly use it")
 
-    def instruction_length_n(self, register):
-        n = register.n
+    def instruction_length_n(self, n):
         return self.instructions[n % 100].instruction_length
 
-    def subcall(self, mem, pos=0):
-        return self(mem, pos)
+    def subcall(self, mem, pos=0, relative_base=0):
+        return self(mem, pos, relative_base)
 
-    def get_with_mode(self, array, val, mod):
+    @staticmethod
+    def get_address(mem, pos, mod, relative_base=0):
         if mod == 1:
-            return val
+            return pos
 
-        index = val + self.RelativeBase if mod == 2 else val
-        return array[index]
+        return mem[pos] + relative_base if mod == 2 else mem[pos]
 
 
 class SumInstruction(Instruction):
     def __init__(self):
         super().__init__(n=1, instruction_length=4)
 
-    def oper(self, params):
+    def oper(self, mem, params):
         s1, s2, dest = params
 
-        dest.n = int(s1) + int(s2)
+        mem[dest] = mem[s1] + mem[s2]
 
 
 class MultiplyInstruction(Instruction):
     def __init__(self):
         super().__init__(n=2, instruction_length=4)
 
-    def oper(self, params):
+    def oper(self, mem, params):
         s1, s2, dest = params
-        dest.n = int(s1) * int(s2)
+        mem[dest] = mem[s1] * mem[s2]
 
 
 class InputInstruction(Instruction):
@@ -148,10 +772,10 @@ class InputInstruction(Instruction):
 
         self.input = input
 
-    def oper(self, params):
+    def oper(self, mem, params):
         res, = params
         try:
-            res.n = int(self.input.pop(0))
+            mem[res] = int(self.input.popleft())
         except IndexError:
             raise EmptyInputException
 
@@ -162,68 +786,70 @@ class OutputInstruction(Instruction):
 
         self.output = output
 
-    def oper(self, params):
+    def oper(self, mem, params):
         v, = params
 
-        self.output.append(int(v))
+        self.output.append(mem[v])
 
 
 class JumpIfTrueInstruction(Instruction):
     def __init__(self):
         super().__init__(n=5, instruction_length=3)
 
-    def oper(self, params):
+    def oper(self, mem, params):
         v, pointer = params
 
-        if int(v):
-            return int(pointer)
+        if mem[v]:
+            return mem[pointer]
 
 
 class JumpIfFalseInstruction(Instruction):
     def __init__(self):
         super().__init__(n=6, instruction_length=3)
 
-    def oper(self, params):
+    def oper(self, mem, params):
         v, pointer = params
 
-        if not int(v):
-            return int(pointer)
+        if not mem[v]:
+            return mem[pointer]
 
 
 class LessThanInstruction(Instruction):
     def __init__(self):
         super().__init__(n=7, instruction_length=4)
 
-    def oper(self, params):
+    def oper(self, mem, params):
         param1, param2, res = params
 
-        res.n = int(int(param1) < int(param2))
+        mem[res] = int(mem[param1] < mem[param2])
 
 
 class EqualInstruction(Instruction):
     def __init__(self):
         super().__init__(n=8, instruction_length=4)
 
-    def oper(self, params):
+    def oper(self, mem, params):
         p1, p2, res = params
 
-        res.n = int(int(p1) == int(p2))
+        mem[res] = int(mem[p1] == mem[p2])
 
 
 class BaseAdjustmentInstruction(Instruction):
-    def __init__(self):
+    def __init__(self, computer):
         super().__init__(n=9, instruction_length=2)
 
-    def oper(self, params):
+        self.computer = computer
+
+    def oper(self, mem, params):
         param1, = params
-        #print(f'Adjusting relative base from {Instruction.RelativeBase} to {Instruction.RelativeBase + int(param1)} '
-        #       f'({param1})')
-        Instruction.RelativeBase += int(param1)
+        #print(f'Adjusting relative base from {self.computer.relative_base} to '
+        #      f'{self.computer.relative_base + mem[param1]} ({param1})')
+        self.computer.relative_base += mem[param1]
 
 
 class HaltInstruction(Instruction):
     def __init__(self):
         super().__init__(n=99, instruction_length=1)
 
-    def oper(self, params):
+    def oper(self, mem, params):
         raise HaltException
@@ -1,10 +1,11 @@
 import math
 import sys
-
-import pandas as pd
+from contextlib import contextmanager
 
 
 def read_stdin(file):
+    import pandas as pd  # Only the days reading CSV input pay for importing pandas
+
     if file is None:
         file = sys.stdin
 
@@ -12,6 +13,20 @@ def read_stdin(file):
     return df
 
 
+@contextmanager
+def overridden(namespace, **values):
+    """Temporarily set names in a namespace dict (e.g. a module's globals() flags), restoring them on exit.
+
+    Also usable as a decorator.
+    """
+    previous = {name: namespace[name] for name in values}
+    namespace.update(values)
+    try:
+        yield
+    finally:
+        namespace.update(previous)
+
+
 class Coord:
     def __init__(self, x, y, n=0, c=None):
         self.x = x